@@ -4,23 +4,36 @@ import os
 from pathlib import Path
 from flask import Flask
 
-from .db import init_db
-from .web.routes import web
 
+_ENV_PATH = Path(__file__).resolve().parent.parent / ".env"
+_ENV_LOADED = False
+
+
+def _load_env_once() -> None:
+    """Load `.env` at most once per process (create_app may run many times)."""
+    global _ENV_LOADED
+    if _ENV_LOADED:
+        return
+    _ENV_LOADED = True
 
-def create_app() -> Flask:
-    # Make local development reliable: load `.env` if present.
-    # Flask CLI can also load this via python-dotenv, but that does not apply to
-    # other entrypoints (e.g., mod_wsgi, gunicorn, `python wsgi.py`, tests).
     try:
         from dotenv import load_dotenv  # type: ignore
+    except ImportError:
+        return
 
-        env_path = Path(__file__).resolve().parent.parent / ".env"
-        if env_path.exists():
-            load_dotenv(env_path, override=False)
+    try:
+        if _ENV_PATH.exists():
+            load_dotenv(_ENV_PATH, override=False)
     except Exception:
         pass
 
+
+def create_app() -> Flask:
+    # Make local development reliable: load `.env` if present.
+    # Flask CLI can also load this via python-dotenv, but that does not apply to
+    # other entrypoints (e.g., mod_wsgi, gunicorn, `python wsgi.py`, tests).
+    _load_env_once()
+
     app = Flask(
         __name__,
         template_folder="web/templates",
@@ -32,11 +45,23 @@ def create_app() -> Flask:
         DATABASE_PATH=os.environ.get("DATABASE_PATH", os.path.join(app.instance_path, "help_me_post.sqlite3")),
         UPLOAD_DIR=os.environ.get("UPLOAD_DIR", os.path.join(app.instance_path, "uploads")),
         MAX_CONTENT_LENGTH=int(os.environ.get("MAX_CONTENT_LENGTH", str(1024 * 1024 * 512))),  # 512MB
+        # Behind Apache + mod_xsendfile: media files are sent by Apache, not Python.
+        USE_X_SENDFILE=os.environ.get("USE_X_SENDFILE", "").strip().lower() in {"1", "true", "yes", "y", "on"},
+        # Worker processes for Bluesky image compression; 0 compresses in-process.
+        # Only enable where sys.executable is Python (not under mod_wsgi).
+        IMAGE_OPTIMIZE_WORKERS=int(os.environ.get("IMAGE_OPTIMIZE_WORKERS", "0")),
     )
 
     os.makedirs(app.instance_path, exist_ok=True)
     os.makedirs(app.config["UPLOAD_DIR"], exist_ok=True)
 
+    # Imported here so `import app` stays cheap; the view tree pulls in the DB,
+    # AI client, and image tooling.
+    from .db import init_db
+    from .web.json_provider import FastJSONProvider
+    from .web.routes import web
+
+    app.json = FastJSONProvider(app)
     init_db(app)
 
     app.register_blueprint(web)
@@ -0,0 +1,221 @@
+"""OpenAI Batch API helpers for non-interactive plan (re)generation.
+
+Batch jobs are cheaper than realtime calls but complete asynchronously (up to
+24h). Each request is the same chat-completions payload `AIClient.generate_plan`
+sends; results go through the same parsing + `validate_plan` path.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import quote
+
+from app.core import fastjson
+
+from .client import AIClient, AIError, PlanGenerationResult
+
+
+OPENAI_API_BASE = "https://api.openai.com"
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+
+# Statuses after which a batch will not change anymore.
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+class PlanBatchError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class PlanBatchSubmission:
+    batch_id: str
+    input_file_id: str
+    status: str
+    targets_by_id: dict[str, list[str]]
+
+
+@dataclass(frozen=True)
+class PlanBatchStatus:
+    batch_id: str
+    status: str
+    output_file_id: str | None
+    error_file_id: str | None
+
+
+def build_jsonl(client: AIClient, batch: list[dict[str, Any]]) -> tuple[bytes, dict[str, list[str]]]:
+    """Serialize plan requests into Batch API JSONL.
+
+    Each item holds `generate_plan` keyword arguments plus an optional `custom_id`
+    (defaults to `plan-<index>`). Returns (jsonl_bytes, targets_by_custom_id).
+    """
+
+    lines: list[str] = []
+    targets_by_id: dict[str, list[str]] = {}
+    for i, item in enumerate(batch):
+        kwargs = dict(item)
+        custom_id = str(kwargs.pop("custom_id", None) or f"plan-{i}")
+        if custom_id in targets_by_id:
+            raise PlanBatchError(f"duplicate custom_id: {custom_id}")
+
+        payload, targets_norm = client.build_payload(**kwargs)
+        targets_by_id[custom_id] = targets_norm
+        lines.append(fastjson.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": payload}))
+
+    return ("\n".join(lines) + "\n").encode("utf-8"), targets_by_id
+
+
+def _auth_headers(client: AIClient) -> dict[str, str]:
+    if not client.api_key:
+        raise PlanBatchError("OPENAI_API_KEY is not configured")
+    return {"Authorization": f"Bearer {client.api_key}"}
+
+
+def _json_or_raise(resp: Any, what: str) -> dict[str, Any]:
+    if resp.status_code >= 400:
+        raise PlanBatchError(f"{what} failed: HTTP {resp.status_code}: {(resp.text or '')[:512]}")
+    try:
+        data = fastjson.loads(resp.content)
+    except ValueError as e:
+        raise PlanBatchError(f"{what} failed: response was not valid JSON") from e
+    if not isinstance(data, dict):
+        raise PlanBatchError(f"{what} failed: unexpected response format")
+    return data
+
+
+def submit_plan_batch(client: AIClient, batch: list[dict[str, Any]]) -> PlanBatchSubmission:
+    """Upload the requests as a JSONL file and create a batch job."""
+
+    if not batch:
+        raise PlanBatchError("batch must not be empty")
+
+    headers = _auth_headers(client)
+    jsonl, targets_by_id = build_jsonl(client, batch)
+
+    uploaded = _json_or_raise(
+        client.http.post(
+            f"{OPENAI_API_BASE}/v1/files",
+            headers=headers,
+            data={"purpose": "batch"},
+            files={"file": ("plans.jsonl", jsonl, "application/jsonl")},
+            timeout=120,
+        ),
+        "Batch file upload",
+    )
+    input_file_id = uploaded.get("id")
+    if not isinstance(input_file_id, str) or not input_file_id:
+        raise PlanBatchError("Batch file upload failed: missing file id")
+
+    created = _json_or_raise(
+        client.http.post(
+            f"{OPENAI_API_BASE}/v1/batches",
+            headers=headers,
+            json={
+                "input_file_id": input_file_id,
+                "endpoint": BATCH_ENDPOINT,
+                "completion_window": BATCH_COMPLETION_WINDOW,
+            },
+            timeout=60,
+        ),
+        "Batch creation",
+    )
+    batch_id = created.get("id")
+    if not isinstance(batch_id, str) or not batch_id:
+        raise PlanBatchError("Batch creation failed: missing batch id")
+
+    return PlanBatchSubmission(
+        batch_id=batch_id,
+        input_file_id=input_file_id,
+        status=str(created.get("status") or "validating"),
+        targets_by_id=targets_by_id,
+    )
+
+
+def poll_plan_batch(client: AIClient, batch_id: str) -> PlanBatchStatus:
+    """Fetch the current status of a batch job (single request, no waiting)."""
+
+    data = _json_or_raise(
+        client.http.get(
+            f"{OPENAI_API_BASE}/v1/batches/{quote(batch_id, safe='')}", headers=_auth_headers(client), timeout=30
+        ),
+        "Batch status",
+    )
+    return PlanBatchStatus(
+        batch_id=batch_id,
+        status=str(data.get("status") or "unknown"),
+        output_file_id=data.get("output_file_id") or None,
+        error_file_id=data.get("error_file_id") or None,
+    )
+
+
+def wait_for_plan_batch(
+    client: AIClient,
+    batch_id: str,
+    *,
+    interval: float = 30.0,
+    timeout: float | None = None,
+) -> PlanBatchStatus:
+    """Poll until the batch reaches a terminal status (or `timeout` seconds pass)."""
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        status = poll_plan_batch(client, batch_id)
+        if status.status in TERMINAL_STATUSES:
+            return status
+        if deadline is not None and time.monotonic() >= deadline:
+            return status
+        time.sleep(interval)
+
+
+def fetch_plan_batch_results(
+    client: AIClient,
+    output_file_id: str,
+    targets_by_id: dict[str, list[str]],
+) -> dict[str, PlanGenerationResult]:
+    """Download a completed batch's output and validate each plan."""
+
+    resp = client.http.get(
+        f"{OPENAI_API_BASE}/v1/files/{output_file_id}/content",
+        headers=_auth_headers(client),
+        timeout=120,
+    )
+    if resp.status_code >= 400:
+        raise PlanBatchError(f"Batch output download failed: HTTP {resp.status_code}")
+
+    results: dict[str, PlanGenerationResult] = {}
+    for line in resp.content.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        try:
+            row = fastjson.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(row, dict):
+            continue
+        custom_id = str(row.get("custom_id") or "")
+        if custom_id not in targets_by_id:
+            continue
+
+        response = row.get("response")
+        if not isinstance(response, dict):
+            # Error rows carry `"response": null` (or junk); record them as failed.
+            response = {}
+        status_code = response.get("status_code")
+        if status_code != 200:
+            results[custom_id] = PlanGenerationResult(
+                ok=False,
+                plan=None,
+                warnings=[],
+                error=AIError(
+                    error_type="api_error",
+                    human_message=f"AI generation failed: HTTP {status_code or '?'}.",
+                    details=fastjson.dumps(row.get("error") or response.get("body")),
+                ),
+            )
+            continue
+
+        results[custom_id] = client.parse_response(response.get("body"), targets_by_id[custom_id])
+
+    return results
@@ -1,15 +1,37 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import atexit
+import functools
 import os
-import urllib.error
-import urllib.request
+import random
+import time
 from dataclasses import dataclass
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Iterator, Mapping
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core import fastjson
 
 from .plan_validation import ValidationResult, validate_plan
 
 
+OPENAI_CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
+
+# Retries for transient API failures (429 / 5xx).
+MAX_ATTEMPTS = 3
+RETRY_MAX_DELAY = 30.0
+
+
+def _build_http_session() -> requests.Session:
+    # Keep-alive pool so back-to-back generations skip the TCP+TLS handshake.
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=20))
+    return session
+
+
 @dataclass(frozen=True)
 class AIError:
     error_type: str
@@ -25,16 +47,200 @@ class PlanGenerationResult:
     error: AIError | None
 
 
+_SYSTEM_PROMPT = (
+    "You are a helpful assistant that outputs ONLY valid JSON. "
+    "No markdown, no code fences, no extra keys, no trailing text."
+)
+
+
+# Static prompt pieces; `_rules_and_schema` only selects between them.
+_SCHEMA_BLUESKY: Mapping[str, str] = MappingProxyType(
+    {
+        "text": "string (<= 300 chars, includes hashtags inline at end)",
+        "hashtags": "array of strings (2-5 items, no '#')",
+        "alt_text": "array of strings (one per media item; can be empty strings if unknown)",
+    }
+)
+_SCHEMA_YOUTUBE: Mapping[str, str] = MappingProxyType(
+    {
+        "title": "string (<= 100 chars)",
+        "description": "string (2-5 short paragraphs)",
+        "tags": "array of strings (8-20 items)",
+        "category": "string (human-readable)",
+    }
+)
+
+_BASE_RULES: tuple[str, ...] = (
+    "Return ONLY a single JSON object matching required schema.",
+    "Prefer specific nouns from the focus and media.",
+    "Bluesky: the opening line should be a concrete hook that restates the focus in plain English.",
+    "Avoid opening with salesy questions like 'Are you looking to…'.",
+    "Keep tone consistent with the selected tone (Cozy should feel warm, not salesy).",
+    "If a section is not requested, OMIT its key entirely (do not include empty placeholders).",
+)
+
+_BLUESKY_RULES: tuple[str, ...] = (
+    "Bluesky voice: default to first-person ('I', 'my') unless the user focus clearly implies otherwise.",
+    "Avoid marketing phrases like 'Help your posts…', 'Discover…', 'Boost…'.",
+    "Bluesky.hashtags must NOT include '#'; Bluesky.text should include hashtags inline at the end.",
+    "Bluesky.alt_text must be an array with the same length and order as media_summary.",
+    "Bluesky.hashtags: 2-5 items (max 5).",
+    "Bluesky.hashtags: at least 2 should be specific to the focus when possible.",
+    "Bluesky.hashtags: prefer specific project/platform/tech tags when relevant (e.g. HelpMePost, Bluesky, ATProto, Flask, OpenSource, IndieDev).",
+    "Avoid generic tags like 'creators', 'content', 'producers' unless the focus explicitly relates to music/video production.",
+    "Tags like 'makers'/'artists' are allowed but should not dominate the set.",
+    "Hashtags must be consistent casing across the list (all lowercase or all CamelCase), and must not include '#'.",
+)
+
+_EMOJI_RULES: tuple[str, ...] = (
+    "Emojis are allowed but must be used sparingly.",
+    "YouTube.title: max 2 emojis total, placed only at the start or end (not mid-word).",
+    "Bluesky.text: max 3 emojis total.",
+)
+_NO_EMOJI_RULES: tuple[str, ...] = ("Do not use emojis.",)
+
+_NO_CTA_RULES: tuple[str, ...] = ("Do not include any call-to-action.",)
+_CTA_RULES: tuple[str, ...] = (
+    "Include a short call-to-action. Bluesky: add a short CTA line near the end; keep hashtags as the final line. "
+    "YouTube.description: include a short CTA near the top or bottom (but do not spam).",
+)
+_CTA_GENERIC_RULES: tuple[str, ...] = (
+    "If no link/handle is provided, use a generic CTA like 'link in post/description'.",
+)
+_CTA_LINK_TAIL: tuple[str, ...] = (
+    "If the provided CTA target is just a link/handle, do NOT call it a video; refer to it as a link or handle.",
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _rules_and_schema(
+    targets: tuple[str, ...],
+    add_emojis: bool,
+    cta_kind: str,
+) -> tuple[tuple[str, ...], tuple[str, ...], dict[str, Any]]:
+    """Prompt pieces that depend only on the option flags (memoized).
+
+    `cta_kind` is one of: none (CTA disabled), generic (no target), link, video.
+    Returns (rules_before_cta_target, rules_after_cta_target, schema); the caller
+    inserts the verbatim CTA target rule between the two rule groups.
+    The returned schema is shared between calls and must not be mutated.
+    """
+
+    want_bluesky = "bluesky" in targets
+    want_youtube = "youtube" in targets
+
+    # Canonical schema reminder for the model (target-scoped). Sections are copied
+    # to plain dicts once per cache entry so the payload stays JSON-serializable.
+    schema: dict[str, Any] = {}
+    if want_bluesky:
+        schema["bluesky"] = dict(_SCHEMA_BLUESKY)
+    if want_youtube:
+        schema["youtube"] = dict(_SCHEMA_YOUTUBE)
+
+    rules = _BASE_RULES
+    if want_bluesky:
+        rules += _BLUESKY_RULES
+
+    # Optional emojis.
+    rules += _EMOJI_RULES if add_emojis else _NO_EMOJI_RULES
+
+    # Optional CTA.
+    tail: tuple[str, ...] = ()
+    if cta_kind == "none":
+        rules += _NO_CTA_RULES
+    else:
+        rules += _CTA_RULES
+        if cta_kind == "generic":
+            rules += _CTA_GENERIC_RULES
+        elif cta_kind == "link":
+            tail = _CTA_LINK_TAIL
+
+    return rules, tail, schema
+
+
+def _is_retryable(resp: Any) -> bool:
+    if resp.status_code >= 500:
+        return True
+    if resp.status_code != 429:
+        return False
+    # OpenAI also uses 429 for exhausted quota; retrying that cannot succeed.
+    return "insufficient_quota" not in (resp.text or "")
+
+
+def _retry_delay(resp: Any, attempt: int) -> float:
+    retry_after = resp.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(RETRY_MAX_DELAY, max(0.0, float(retry_after)))
+        except ValueError:
+            pass  # HTTP-date form; fall back to backoff.
+    return min(RETRY_MAX_DELAY, 2 ** (attempt - 1) + random.uniform(0, 0.5))
+
+
+def _http_error(resp: Any, attempts: int) -> AIError:
+    # OpenAI uses 429 both for rate limits and quota exhaustion.
+    details = f"HTTP {resp.status_code}: {resp.reason or ''}".strip()
+    try:
+        raw = resp.text
+        if raw:
+            # Best-effort parse. If it isn't JSON, keep raw.
+            try:
+                j = fastjson.loads(raw)
+                details = (details + " | " + fastjson.dumps(j)) if details else fastjson.dumps(j)
+            except ValueError:
+                details = (details + " | " + raw) if details else raw
+    except Exception:
+        pass
+    details += f" | attempts: {attempts}"
+
+    retry_after = resp.headers.get("Retry-After")
+
+    if resp.status_code == 429:
+        hint = " Try again shortly."
+        if retry_after:
+            hint = f" Try again in ~{retry_after} seconds."
+        return AIError(
+            error_type="rate_limited",
+            human_message=(
+                "OpenAI is rate-limiting this request (HTTP 429)." + hint + " "
+                "You can also use 'Template Draft (no AI)' as a fallback."
+            ).strip(),
+            details=details,
+        )
+
+    return AIError(
+        error_type="api_error",
+        human_message=f"AI generation failed: HTTP {resp.status_code}.",
+        details=details,
+    )
+
+
 class AIClient:
     """All AI calls in one place.
 
-    For now this uses OpenAI's HTTP API directly via stdlib (no extra deps).
+    This uses OpenAI's HTTP API directly via a pooled `requests.Session` that is
+    shared by all instances (connections are reused across requests).
     If OPENAI_API_KEY is not set, returns a structured error (no silent stubs).
     """
 
-    def __init__(self, *, api_key: str | None = None, model: str | None = None) -> None:
+    _shared_http: requests.Session = _build_http_session()
+
+    def __init__(
+        self,
+        *,
+        api_key: str | None = None,
+        model: str | None = None,
+        http: requests.Session | None = None,
+    ) -> None:
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         self.model = model or os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+        # An injected session belongs to the caller; the shared one is closed at exit.
+        self._http = http if http is not None else AIClient._shared_http
+
+    @property
+    def http(self) -> requests.Session:
+        """The pooled session this client sends through (also used by `app.ai.batch`)."""
+        return self._http
 
     def generate_plan(
         self,
@@ -55,21 +261,82 @@ class AIClient:
         """
 
         if not self.api_key:
-            return PlanGenerationResult(
-                ok=False,
-                plan=None,
-                warnings=[],
-                error=AIError(
-                    error_type="missing_api_key",
-                    human_message="AI generation is unavailable: OPENAI_API_KEY is not configured.",
-                ),
-            )
-
-        system = (
-            "You are a helpful assistant that outputs ONLY valid JSON. "
-            "No markdown, no code fences, no extra keys, no trailing text."
+            return _missing_api_key_result()
+
+        payload, targets_norm = self.build_payload(
+            focus=focus,
+            audience=audience,
+            tone=tone,
+            media_summary=media_summary,
+            add_emojis=add_emojis,
+            include_cta=include_cta,
+            cta_target=cta_target,
+            generate_targets=generate_targets,
         )
 
+        body, error = self._post_completion(payload)
+        if error is not None:
+            return PlanGenerationResult(ok=False, plan=None, warnings=[], error=error)
+
+        return self.parse_response(body, targets_norm)
+
+    def stream_plan(self, **kwargs: Any) -> PlanStream:
+        """Like `generate_plan`, but streams the model output as it is produced.
+
+        Takes the same keyword arguments. Iterate the returned `PlanStream` for
+        content deltas; once it is exhausted, `stream.result` holds the validated
+        `PlanGenerationResult` (the plan is JSON, so it is only parsed at the end).
+        """
+
+        if not self.api_key:
+            return PlanStream(None, None, result=_missing_api_key_result())
+
+        payload, targets_norm = self.build_payload(**kwargs)
+        payload["stream"] = True
+        return PlanStream(self, payload, targets_norm)
+
+    async def agenerate_plan(self, **kwargs: Any) -> PlanGenerationResult:
+        """Async variant of `generate_plan` (same keyword arguments).
+
+        The blocking HTTP call runs in a worker thread and shares the pooled session,
+        so several plans can be in flight at once.
+        """
+        return await asyncio.to_thread(self.generate_plan, **kwargs)
+
+    async def agenerate_plan_batch(
+        self,
+        batch: list[dict[str, Any]],
+        *,
+        concurrency: int = 8,
+    ) -> list[PlanGenerationResult | BaseException]:
+        """Generate several plans concurrently.
+
+        Each item in `batch` holds the keyword arguments for `generate_plan`.
+        At most `concurrency` calls are in flight; results keep the input order and
+        unexpected exceptions are returned in place rather than raised.
+        """
+        sem = asyncio.Semaphore(max(1, int(concurrency)))
+
+        async def _one(kwargs: dict[str, Any]) -> PlanGenerationResult:
+            async with sem:
+                return await self.agenerate_plan(**kwargs)
+
+        return await asyncio.gather(*(_one(r) for r in batch), return_exceptions=True)
+
+    def build_payload(
+        self,
+        *,
+        focus: str,
+        audience: str | None,
+        tone: str | None,
+        media_summary: list[dict[str, Any]],
+        add_emojis: bool = False,
+        include_cta: bool = False,
+        cta_target: str | None = None,
+        generate_targets: list[str] | None = None,
+    ) -> tuple[dict[str, Any], list[str]]:
+        """Build the chat-completions payload and the normalized target list."""
+
         targets_norm: list[str] = []
         for t in (generate_targets or ["bluesky", "youtube"]):
             if isinstance(t, str):
@@ -79,77 +346,19 @@ class AIClient:
         if not targets_norm:
             targets_norm = ["bluesky", "youtube"]
 
-        want_bluesky = "bluesky" in targets_norm
-        want_youtube = "youtube" in targets_norm
-
-        # Canonical schema reminder for the model (target-scoped).
-        schema: dict[str, Any] = {}
-        if want_bluesky:
-            schema["bluesky"] = {
-                "text": "string (<= 300 chars, includes hashtags inline at end)",
-                "hashtags": "array of strings (2-5 items, no '#')",
-                "alt_text": "array of strings (one per media item; can be empty strings if unknown)",
-            }
-        if want_youtube:
-            schema["youtube"] = {
-                "title": "string (<= 100 chars)",
-                "description": "string (2-5 short paragraphs)",
-                "tags": "array of strings (8-20 items)",
-                "category": "string (human-readable)",
-            }
-
-        rules = [
-            "Return ONLY a single JSON object matching required schema.",
-            "Prefer specific nouns from the focus and media.",
-            "Bluesky: the opening line should be a concrete hook that restates the focus in plain English.",
-            "Avoid opening with salesy questions like 'Are you looking to…'.",
-            "Keep tone consistent with the selected tone (Cozy should feel warm, not salesy).",
-            "If a section is not requested, OMIT its key entirely (do not include empty placeholders).",
-        ]
-
-        if want_bluesky:
-            rules.extend(
-                [
-                    "Bluesky voice: default to first-person ('I', 'my') unless the user focus clearly implies otherwise.",
-                    "Avoid marketing phrases like 'Help your posts…', 'Discover…', 'Boost…'.",
-                    "Bluesky.hashtags must NOT include '#'; Bluesky.text should include hashtags inline at the end.",
-                    "Bluesky.alt_text must be an array with the same length and order as media_summary.",
-                    "Bluesky.hashtags: 2-5 items (max 5).",
-                    "Bluesky.hashtags: at least 2 should be specific to the focus when possible.",
-                    "Bluesky.hashtags: prefer specific project/platform/tech tags when relevant (e.g. HelpMePost, Bluesky, ATProto, Flask, OpenSource, IndieDev).",
-                    "Avoid generic tags like 'creators', 'content', 'producers' unless the focus explicitly relates to music/video production.",
-                    "Tags like 'makers'/'artists' are allowed but should not dominate the set.",
-                    "Hashtags must be consistent casing across the list (all lowercase or all CamelCase), and must not include '#'.",
-                ]
-            )
-
-        # Optional emojis.
-        if add_emojis:
-            rules.extend(
-                [
-                    "Emojis are allowed but must be used sparingly.",
-                    "YouTube.title: max 2 emojis total, placed only at the start or end (not mid-word).",
-                    "Bluesky.text: max 3 emojis total.",
-                ]
-            )
+        if not include_cta:
+            cta_kind = "none"
+        elif not cta_target:
+            cta_kind = "generic"
         else:
-            rules.append("Do not use emojis.")
+            tl = cta_target.lower()
+            cta_kind = "video" if ("youtu.be" in tl or "youtube.com" in tl) else "link"
 
-        # Optional CTA.
-        if include_cta:
-            rules.append(
-                "Include a short call-to-action. Bluesky: add a short CTA line near the end; keep hashtags as the final line. "
-                "YouTube.description: include a short CTA near the top or bottom (but do not spam)."
-            )
-            if cta_target:
-                rules.append(f"The CTA MUST include this exact string verbatim: {cta_target}")
-                tl = cta_target.lower()
-                if "youtu.be" not in tl and "youtube.com" not in tl:
-                    rules.append("If the provided CTA target is just a link/handle, do NOT call it a video; refer to it as a link or handle.")
-            else:
-                rules.append("If no link/handle is provided, use a generic CTA like 'link in post/description'.")
-        else:
-            rules.append("Do not include any call-to-action.")
+        rules_head, rules_tail, schema = _rules_and_schema(tuple(targets_norm), bool(add_emojis), cta_kind)
+        rules = list(rules_head)
+        if cta_kind in ("video", "link"):
+            rules.append(f"The CTA MUST include this exact string verbatim: {cta_target}")
+            rules.extend(rules_tail)
 
         user = {
             "task": "Generate a posting plan for Bluesky and YouTube.",
@@ -168,89 +377,81 @@ class AIClient:
         payload = {
             "model": self.model,
             "messages": [
-                {"role": "system", "content": system},
-                {"role": "user", "content": json.dumps(user)},
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": fastjson.dumps(user)},
             ],
             "temperature": 0.5,
         }
 
-        req = urllib.request.Request(
-            url="https://api.openai.com/v1/chat/completions",
-            method="POST",
-            data=json.dumps(payload).encode("utf-8"),
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}",
-            },
-        )
+        return payload, targets_norm
+
+    def _post_completion(self, payload: dict[str, Any]) -> tuple[Any, AIError | None]:
+        """POST the payload and return (decoded body, None) or (None, error)."""
+
+        resp, error = self._send(payload)
+        if error is not None:
+            return None, error
 
         try:
-            with urllib.request.urlopen(req, timeout=60) as resp:
-                body = json.loads(resp.read().decode("utf-8"))
-        except urllib.error.HTTPError as e:
-            # OpenAI uses 429 both for rate limits and quota exhaustion.
-            details = f"HTTP {getattr(e, 'code', '?')}: {getattr(e, 'reason', '')}".strip()
-            try:
-                raw = e.read().decode("utf-8")
-                if raw:
-                    # Best-effort parse. If it isn't JSON, keep raw.
-                    try:
-                        j = json.loads(raw)
-                        details = (details + " | " + json.dumps(j, ensure_ascii=False)) if details else json.dumps(j, ensure_ascii=False)
-                    except Exception:
-                        details = (details + " | " + raw) if details else raw
-            except Exception:
-                pass
-
-            retry_after = None
+            body = fastjson.loads(resp.content)
+        except ValueError as e:
+            return None, AIError(
+                error_type="api_error",
+                human_message="AI generation failed due to an API/network error.",
+                details=str(e),
+            )
+
+        return body, None
+
+    def _send(self, payload: dict[str, Any], *, stream: bool = False) -> tuple[Any, AIError | None]:
+        """POST the payload and return (response, None) or (None, error).
+
+        Transient failures (429 rate limits, 5xx) are retried up to MAX_ATTEMPTS
+        times, honoring Retry-After or backing off exponentially with jitter.
+        With `stream=True` the body is left unread for the caller to iterate.
+        """
+
+        data = fastjson.dumps_bytes(payload)
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+        }
+
+        attempt = 0
+        while True:
+            attempt += 1
             try:
-                retry_after = e.headers.get("Retry-After")
-            except Exception:
-                retry_after = None
-
-            if getattr(e, "code", None) == 429:
-                hint = " Try again shortly."
-                if retry_after:
-                    hint = f" Try again in ~{retry_after} seconds."
-                return PlanGenerationResult(
-                    ok=False,
-                    plan=None,
-                    warnings=[],
-                    error=AIError(
-                        error_type="rate_limited",
-                        human_message=(
-                            "OpenAI is rate-limiting this request (HTTP 429)." + hint + " "
-                            "You can also use 'Template Draft (no AI)' as a fallback."
-                        ).strip(),
-                        details=details,
-                    ),
+                resp = self._http.post(
+                    OPENAI_CHAT_COMPLETIONS_URL,
+                    data=data,
+                    headers=headers,
+                    timeout=60,
+                    **({"stream": True} if stream else {}),
                 )
-
-            return PlanGenerationResult(
-                ok=False,
-                plan=None,
-                warnings=[],
-                error=AIError(
-                    error_type="api_error",
-                    human_message=f"AI generation failed: HTTP {getattr(e, 'code', '?')}.",
-                    details=details,
-                ),
-            )
-        except Exception as e:
-            return PlanGenerationResult(
-                ok=False,
-                plan=None,
-                warnings=[],
-                error=AIError(
+            except (requests.RequestException, OSError) as e:
+                return None, AIError(
                     error_type="api_error",
                     human_message="AI generation failed due to an API/network error.",
                     details=str(e),
-                ),
-            )
+                )
 
-        try:
-            content = body["choices"][0]["message"]["content"]
-        except Exception:
+            if resp.status_code < 400:
+                return resp, None
+            if attempt < MAX_ATTEMPTS and _is_retryable(resp):
+                delay = _retry_delay(resp, attempt)
+                resp.close()  # Release the pooled connection before waiting.
+                time.sleep(delay)
+                continue
+            return None, _http_error(resp, attempt)
+
+    def parse_response(self, body: Any, targets_norm: list[str]) -> PlanGenerationResult:
+        """Extract, decode, and validate the plan from a chat-completions body."""
+
+        choices = body.get("choices") if isinstance(body, dict) else None
+        first = choices[0] if isinstance(choices, list) and choices else None
+        message = first.get("message") if isinstance(first, dict) else None
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, str):
             return PlanGenerationResult(
                 ok=False,
                 plan=None,
@@ -261,9 +462,14 @@ class AIClient:
                 ),
             )
 
+        return self._parse_content(content, targets_norm)
+
+    def _parse_content(self, content: str, targets_norm: list[str]) -> PlanGenerationResult:
+        """Decode and validate the model's JSON message content."""
+
         try:
-            plan = json.loads(content)
-        except Exception as e:
+            plan = fastjson.loads(content)
+        except ValueError as e:
             return PlanGenerationResult(
                 ok=False,
                 plan=None,
@@ -289,3 +495,89 @@ class AIClient:
             )
 
         return PlanGenerationResult(ok=True, plan=plan, warnings=validation.warnings, error=None)
+
+
+class PlanStream:
+    """Content deltas of a streamed plan generation; see `AIClient.stream_plan`.
+
+    Single use. `result` is None until iteration has finished.
+    """
+
+    def __init__(
+        self,
+        client: AIClient | None,
+        payload: dict[str, Any] | None,
+        targets_norm: list[str] | None = None,
+        *,
+        result: PlanGenerationResult | None = None,
+    ) -> None:
+        self._client = client
+        self._payload = payload
+        self._targets_norm = targets_norm or []
+        self.result = result
+
+    def __iter__(self) -> Iterator[str]:
+        if self.result is not None or self._client is None or self._payload is None:
+            return
+
+        resp, error = self._client._send(self._payload, stream=True)
+        if error is not None:
+            self.result = PlanGenerationResult(ok=False, plan=None, warnings=[], error=error)
+            return
+
+        parts: list[str] = []
+        try:
+            # Server-sent events: one `data: {chunk}` line per delta, then `data: [DONE]`.
+            for line in resp.iter_lines():
+                if not line or not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                try:
+                    chunk = fastjson.loads(data)
+                except ValueError:
+                    continue
+                delta = _delta_content(chunk)
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except (requests.RequestException, OSError) as e:
+            self.result = PlanGenerationResult(
+                ok=False,
+                plan=None,
+                warnings=[],
+                error=AIError(
+                    error_type="api_error",
+                    human_message="AI generation failed due to an API/network error.",
+                    details=str(e),
+                ),
+            )
+            return
+        finally:
+            resp.close()
+
+        self.result = self._client._parse_content("".join(parts), self._targets_norm)
+
+
+def _delta_content(chunk: Any) -> str | None:
+    choices = chunk.get("choices") if isinstance(chunk, dict) else None
+    first = choices[0] if isinstance(choices, list) and choices else None
+    delta = first.get("delta") if isinstance(first, dict) else None
+    content = delta.get("content") if isinstance(delta, dict) else None
+    return content if isinstance(content, str) else None
+
+
+def _missing_api_key_result() -> PlanGenerationResult:
+    return PlanGenerationResult(
+        ok=False,
+        plan=None,
+        warnings=[],
+        error=AIError(
+            error_type="missing_api_key",
+            human_message="AI generation is unavailable: OPENAI_API_KEY is not configured.",
+        ),
+    )
+
+
+atexit.register(AIClient._shared_http.close)
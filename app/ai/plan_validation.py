@@ -27,14 +27,14 @@ class ValidationResult:
     errors: list[str]
 
 
-def _is_str_list(value: Any) -> bool:
-    return isinstance(value, list) and all(isinstance(x, str) for x in value)
+def is_str_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
 
 
 def _normalize_targets(targets: Any) -> list[str]:
     if targets is None:
         return ["bluesky", "youtube"]
-    if not isinstance(targets, list) or not all(isinstance(x, str) for x in targets):
+    if not is_str_list(targets):
         return ["bluesky", "youtube"]
     out: list[str] = []
     for t in targets:
@@ -84,15 +84,15 @@ def validate_plan(plan: Any, *, targets: list[str] | None = None) -> ValidationR
             if len(b_text) > 300:
                 warnings.append("bluesky.text is longer than 300 characters")
 
-        if not _is_str_list(b_hashtags):
+        if not is_str_list(b_hashtags):
             errors.append("bluesky.hashtags must be an array of strings")
         else:
             if not (2 <= len(b_hashtags) <= 5):
                 warnings.append("bluesky.hashtags should have 2-5 items")
-            if any("#" in h for h in b_hashtags):
+            if "#" in "".join(b_hashtags):
                 errors.append("bluesky.hashtags must not include '#' characters")
 
-        if not _is_str_list(b_alt):
+        if not is_str_list(b_alt):
             errors.append("bluesky.alt_text must be an array of strings")
 
     # YouTube
@@ -112,11 +112,16 @@ def validate_plan(plan: Any, *, targets: list[str] | None = None) -> ValidationR
             errors.append("youtube.description must be a non-empty string")
         else:
             # Paragraph guidance: warn if it doesn't look like multiple paragraphs.
-            paragraphs = [p for p in (x.strip() for x in y_desc.split("\n\n")) if p]
-            if not (2 <= len(paragraphs) <= 5):
+            paragraphs = 0
+            for part in y_desc.split("\n\n"):
+                if part and not part.isspace():
+                    paragraphs += 1
+                    if paragraphs > 5:
+                        break
+            if not (2 <= paragraphs <= 5):
                 warnings.append("youtube.description should be 2-5 short paragraphs")
 
-        if not _is_str_list(y_tags):
+        if not is_str_list(y_tags):
             errors.append("youtube.tags must be an array of strings")
         else:
             if not (8 <= len(y_tags) <= 20):
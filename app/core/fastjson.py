@@ -0,0 +1,37 @@
+"""JSON helpers backed by orjson when installed, stdlib `json` otherwise.
+
+Output is compact and UTF-8 (non-ASCII is not escaped) with either backend.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:  # Optional: `pip install orjson`.
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a JSON string."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(data: str | bytes | bytearray | memoryview) -> Any:
+    """Parse JSON from text or UTF-8 bytes. Raises ValueError on invalid input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
@@ -1,13 +1,51 @@
 from __future__ import annotations
 
+import atexit
+import hashlib
 import io
+import json
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
 
-from PIL import Image
+if TYPE_CHECKING:
+    from PIL import Image
+
+try:  # Optional: libjpeg-turbo bindings (`pip install PyTurboJPEG numpy`).
+    import numpy as _np
+    from turbojpeg import TJFLAG_PROGRESSIVE, TJPF_RGB, TJSAMP_420, TurboJPEG
+except ImportError:  # pragma: no cover - optional dependency
+    _np = None
+    TurboJPEG = None
 
 
 BSKY_MAX_IMAGE_BYTES = 1_000_000
 
+MIN_JPEG_QUALITY = 45
+# Stop searching once a better-fitting quality would gain less than this.
+QUALITY_SEARCH_GAP = 5
+
+# Bump when the algorithm changes so cached results from older versions are ignored.
+OPTIMIZE_CACHE_VERSION = 1
+# Subdirectory of UPLOAD_DIR holding cached optimization results.
+OPTIMIZE_CACHE_DIRNAME = "_opt_cache"
+# Size cap for that directory; least recently used entries are pruned on store.
+OPTIMIZE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Seconds a request waits for one pooled optimization before giving up.
+OPTIMIZE_TIMEOUT_SECONDS = 30
+
+_turbojpeg: Any = None
+_turbojpeg_unavailable = TurboJPEG is None
+
+_pool: ProcessPoolExecutor | None = None
+_pool_unavailable = False
+
 
 class ImageOptimizationError(RuntimeError):
     pass
@@ -25,86 +63,300 @@ class OptimizationResult:
     changed: bool
 
 
-def _resize_to_max_side(img: Image.Image, max_side: int) -> Image.Image:
-    w, h = img.size
+def _fit_to_max_side(w: int, h: int, max_side: int) -> tuple[int, int]:
     if max(w, h) <= max_side:
-        return img
+        return w, h
 
     if w >= h:
-        new_w = max_side
-        new_h = max(1, int(round(h * (max_side / float(w)))))
-    else:
-        new_h = max_side
-        new_w = max(1, int(round(w * (max_side / float(h)))))
+        return max_side, max(1, int(round(h * (max_side / float(w)))))
+    return max(1, int(round(w * (max_side / float(h))))), max_side
+
+
+def _resize_to_max_side(img: Image.Image, max_side: int) -> Image.Image:
+    from PIL import Image
+
+    new_size = _fit_to_max_side(*img.size, max_side)
+    if new_size == img.size:
+        return img
 
     # LANCZOS gives good downscaling quality.
-    return img.resize((new_w, new_h), resample=Image.Resampling.LANCZOS)
+    return img.resize(new_size, resample=Image.Resampling.LANCZOS)
+
+
+def _get_turbojpeg() -> Any:
+    """Return a shared TurboJPEG encoder, or None to use Pillow."""
+    global _turbojpeg, _turbojpeg_unavailable
+    if _turbojpeg_unavailable:
+        return None
+    if _turbojpeg is None:
+        try:
+            # Raises if the libjpeg-turbo shared library can't be found.
+            _turbojpeg = TurboJPEG()
+        except Exception:
+            _turbojpeg_unavailable = True
+            return None
+    return _turbojpeg
+
+
+def _encoder_pixels(img: Image.Image) -> Any:
+    """Pack an RGB image once per size tier for the turbojpeg encoder (None for Pillow)."""
+    if _get_turbojpeg() is None:
+        return None
+    return _np.asarray(img)
+
+
+def _encode_jpeg_into(img: Image.Image, quality: int, buf: io.BytesIO, *, pixels: Any = None) -> int:
+    """Encode into `buf` (rewound and truncated first) and return the encoded size."""
+    buf.seek(0)
+    buf.truncate()
 
+    tj = _get_turbojpeg()
+    if tj is not None:
+        arr = pixels if pixels is not None else _np.asarray(img)
+        buf.write(
+            tj.encode(
+                arr,
+                quality=int(quality),
+                pixel_format=TJPF_RGB,
+                jpeg_subsample=TJSAMP_420,
+                flags=TJFLAG_PROGRESSIVE,
+            )
+        )
+        return buf.tell()
 
-def _encode_jpeg(img: Image.Image, quality: int) -> bytes:
-    buf = io.BytesIO()
     # Strip metadata by not forwarding EXIF and using a fresh save.
     img.save(buf, format="JPEG", quality=int(quality), optimize=True, progressive=True)
-    return buf.getvalue()
+    return buf.tell()
+
+
+def _search_quality(
+    img: Image.Image,
+    top_quality: int,
+    *,
+    pixels: Any = None,
+    bufs: tuple[io.BytesIO, io.BytesIO] | None = None,
+) -> tuple[int, bytes] | None:
+    """Find a high JPEG quality in [MIN_JPEG_QUALITY, top_quality] that fits the limit.
+
+    Encodes at the top quality, then the floor; if only the floor fits, narrows the
+    bracket by interpolating on log(size), which is close to linear in quality.
+    Returns (quality, encoded) or None when even the floor is too large.
+
+    Attempts are encoded into two reused buffers (best fit so far + scratch) and
+    only the accepted encoding is copied out as bytes.
+    """
+
+    best, scratch = bufs if bufs is not None else (io.BytesIO(), io.BytesIO())
+    sizes: dict[int, int] = {}
+
+    def _fits(q: int) -> bool:
+        nonlocal best, scratch
+        sizes[q] = _encode_jpeg_into(img, q, scratch, pixels=pixels)
+        if sizes[q] <= BSKY_MAX_IMAGE_BYTES:
+            best, scratch = scratch, best
+            return True
+        return False
+
+    if _fits(top_quality):
+        return top_quality, best.getvalue()
+
+    lo = MIN_JPEG_QUALITY
+    if not _fits(lo):
+        return None
+
+    hi = top_quality
+    target = math.log(BSKY_MAX_IMAGE_BYTES)
+    while hi - lo > QUALITY_SEARCH_GAP:
+        log_lo = math.log(max(1, sizes[lo]))
+        log_hi = math.log(max(1, sizes[hi]))
+        if log_hi > log_lo:
+            q = lo + int((hi - lo) * (target - log_lo) / (log_hi - log_lo))
+        else:
+            q = (lo + hi) // 2
+        q = min(hi - 1, q)
+        if q - lo < QUALITY_SEARCH_GAP:
+            # The predicted gain is too small to be worth another encode.
+            break
+
+        if _fits(q):
+            lo = q
+        else:
+            hi = q
+
+    return lo, best.getvalue()
+
+
+def _cache_key(input_path: str, mime: str) -> str:
+    # Hashed in chunks: the source is never held in memory whole.
+    with open(input_path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):
+            digest = hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16))
+        else:  # Python < 3.11
+            digest = hashlib.blake2b(digest_size=16)
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    digest.update(f"|{mime.lower()}|v{OPTIMIZE_CACHE_VERSION}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _cache_load(cache_dir: str, key: str) -> dict | None:
+    base = os.path.join(cache_dir, key)
+    try:
+        with open(base + ".json", "rb") as f:
+            meta = json.loads(f.read())
+        with open(base + ".jpg", "rb") as f:
+            data = f.read()
+    except (OSError, ValueError):
+        return None
+    if not isinstance(meta, dict) or meta.get("size_bytes") != len(data):
+        return None
+    try:
+        # Mark as recently used so pruning keeps it.
+        os.utime(base + ".jpg")
+    except OSError:
+        pass
+    return {**meta, "bytes": data}
+
 
+def _cache_store(cache_dir: str, key: str, result: dict) -> None:
+    base = os.path.join(cache_dir, key)
+    meta = {k: v for k, v in result.items() if k != "bytes"}
+    # Unique per process and thread: inline fallbacks can store the same key concurrently.
+    tmp_suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Data first, sidecar last: a readable sidecar means the entry is complete.
+        for path, payload in ((base + ".jpg", result["bytes"]), (base + ".json", json.dumps(meta).encode("utf-8"))):
+            with open(path + tmp_suffix, "wb") as f:
+                f.write(payload)
+            os.replace(path + tmp_suffix, path)
+    except OSError:
+        return  # Best-effort cache.
+    _cache_prune(cache_dir, OPTIMIZE_CACHE_MAX_BYTES)
+
+
+def _cache_prune(cache_dir: str, max_bytes: int) -> None:
+    """Delete the least recently used entries until the cache fits in `max_bytes`."""
+    entries: list[tuple[float, int, str]] = []
+    total = 0
+    try:
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".jpg"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path[: -len(".jpg")]))
+                total += st.st_size
+    except OSError:
+        return
+    if total <= max_bytes:
+        return
+
+    entries.sort()
+    for _mtime, size, base in entries:
+        if total <= max_bytes:
+            break
+        # Sidecar first, so readers see a miss rather than a half-deleted entry.
+        for path in (base + ".json", base + ".jpg"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= size
 
-def optimize_for_bluesky(input_path: str, mime: str) -> dict:
+
+def optimize_for_bluesky(input_path: str, mime: str, *, cache_dir: str | None = None) -> dict:
     """Optimize an image for Bluesky's 1,000,000-byte uploadBlob limit.
 
     Algorithm (deterministic):
-    - Loads via Pillow
-    - Converts to RGB (drops alpha), outputs JPEG
+    - Loads via Pillow (large JPEGs are decoded at a reduced DCT scale that is
+      still at least the first target size)
+    - Converts to RGB (drops alpha), outputs JPEG (libjpeg-turbo via PyTurboJPEG
+      when installed, otherwise Pillow's encoder)
     - Strips metadata (does not preserve EXIF)
     - Starts with max_side=1600 and quality=85
-    - If still >1MB: decreases quality stepwise down to 45
+    - If still >1MB: searches down to quality 45 for the highest quality that fits
+      (within 5 points; see `_search_quality`)
     - If still >1MB at quality 45: shrinks max_side (x0.85), resets quality to 75, repeats
     - Hard stop: if max_side < 640 and still >1MB, raise ImageOptimizationError
 
-    Returns a dict with keys:
+    The output only depends on the input bytes and mime, so when `cache_dir` is
+    given results are stored there keyed by a content hash and reused for
+    identical inputs (capped at OPTIMIZE_CACHE_MAX_BYTES, least recently used
+    entries go first).
+
+    Returns a dict with keys (plain bytes/str/int/bool values, JSON-ready
+    apart from `bytes`):
       bytes, out_mime, out_ext, width, height, quality, size_bytes, changed
     """
 
     if not mime or not mime.lower().startswith("image/"):
         raise ImageOptimizationError("Unsupported mime for image optimization")
 
+    key = None
+    if cache_dir:
+        try:
+            key = _cache_key(input_path, mime)
+        except OSError as e:
+            raise ImageOptimizationError("failed_to_optimize") from e
+        cached = _cache_load(cache_dir, key)
+        if cached is not None:
+            return cached
+
+    result = _optimize_uncached(input_path, mime)
+    if key is not None:
+        _cache_store(cache_dir, key, result)
+    return result
+
+
+def _optimize_uncached(input_path: str, mime: str) -> dict:
+    # Imported lazily: Pillow is only needed when an image actually gets optimized.
+    from PIL import Image
+
     try:
         with Image.open(input_path) as im:
-            im.load()
             src_w, src_h = im.size
             src_mode = im.mode
 
+            max_side = 1600
+            top_quality = 85
+
+            if im.format == "JPEG":
+                # Let libjpeg decode at 1/2, 1/4 or 1/8 scale while staying at or
+                # above the target size, so LANCZOS only finishes the last step.
+                im.draft("RGB", _fit_to_max_side(src_w, src_h, max_side))
+            im.load()
+
             # Normalize to RGB for JPEG output.
             rgb = im.convert("RGB")
 
-            max_side = 1600
-            quality_steps = [85, 75, 65, 55, 45]
-
-            # Loop: resize (if needed) then attempt multiple quality levels.
+            # Loop: resize (if needed) then search for a quality that fits.
             current = _resize_to_max_side(rgb, max_side)
-            chosen_quality = quality_steps[0]
-            encoded = b""
+            bufs = (io.BytesIO(), io.BytesIO())
 
             while True:
-                for q in quality_steps:
-                    chosen_quality = q
-                    encoded = _encode_jpeg(current, q)
-                    if len(encoded) <= BSKY_MAX_IMAGE_BYTES:
-                        w, h = current.size
-                        changed = (
-                            mime.lower() != "image/jpeg"
-                            or (src_w, src_h) != (w, h)
-                            or src_mode != "RGB"
-                        )
-                        return {
-                            "bytes": encoded,
-                            "out_mime": "image/jpeg",
-                            "out_ext": ".jpg",
-                            "width": int(w),
-                            "height": int(h),
-                            "quality": int(chosen_quality),
-                            "size_bytes": int(len(encoded)),
-                            "changed": bool(changed),
-                        }
+                found = _search_quality(current, top_quality, pixels=_encoder_pixels(current), bufs=bufs)
+                if found is not None:
+                    chosen_quality, encoded = found
+                    w, h = current.size
+                    changed = (
+                        mime.lower() != "image/jpeg"
+                        or (src_w, src_h) != (w, h)
+                        or src_mode != "RGB"
+                    )
+                    return {
+                        "bytes": encoded,
+                        "out_mime": "image/jpeg",
+                        "out_ext": ".jpg",
+                        "width": int(w),
+                        "height": int(h),
+                        "quality": int(chosen_quality),
+                        "size_bytes": int(len(encoded)),
+                        "changed": bool(changed),
+                    }
 
                 # If we're here, even quality 45 wasn't enough.
                 max_side = int(max_side * 0.85)
@@ -113,9 +365,99 @@ def optimize_for_bluesky(input_path: str, mime: str) -> dict:
 
                 # Resize again smaller and retry with a slightly higher starting quality.
                 current = _resize_to_max_side(rgb, max_side)
-                quality_steps = [75, 65, 55, 45]
+                top_quality = 75
 
     except ImageOptimizationError:
         raise
     except Exception as e:
         raise ImageOptimizationError("failed_to_optimize") from e
+
+
+def _shutdown_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(_shutdown_pool)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor | None:
+    """Return the shared optimizer process pool, or None to run inline."""
+    global _pool, _pool_unavailable
+    if _pool_unavailable or workers <= 0:
+        return None
+    if _pool is None:
+        try:
+            # spawn: forking a threaded WSGI server is unsafe.
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        except (NotImplementedError, OSError, ValueError):
+            _pool_unavailable = True
+            return None
+    return _pool
+
+
+def _run_inline(fut: Future, input_path: str, mime: str, cache_dir: str | None) -> Future:
+    try:
+        fut.set_result(optimize_for_bluesky(input_path, mime, cache_dir=cache_dir))
+    except Exception as e:
+        fut.set_exception(e)
+    return fut
+
+
+def optimize_for_bluesky_async(
+    input_path: str,
+    mime: str,
+    *,
+    cache_dir: str | None = None,
+    workers: int = 0,
+) -> Future:
+    """Run `optimize_for_bluesky` in a worker process and return its Future.
+
+    Encoding is CPU-bound, so with `workers` > 0 (the IMAGE_OPTIMIZE_WORKERS
+    setting) a process pool keeps concurrent uploads from being serialized by
+    the GIL. With 0 it runs inline and the returned Future is already resolved;
+    if the pool's workers cannot be started, this and later calls fall back to
+    running inline.
+    """
+
+    global _pool_unavailable
+    pool = _get_pool(workers)
+    if pool is None:
+        return _run_inline(Future(), input_path, mime, cache_dir)
+
+    try:
+        inner = pool.submit(optimize_for_bluesky, input_path, mime, cache_dir=cache_dir)
+    except RuntimeError:
+        # Broken or shut down: stop using the pool in this process.
+        _pool_unavailable = True
+        _shutdown_pool()
+        return _run_inline(Future(), input_path, mime, cache_dir)
+
+    outer: Future = Future()
+
+    def _done(inner: Future) -> None:
+        # May run on the executor's management thread: never optimize in here.
+        global _pool_unavailable
+        if inner.cancelled() or isinstance(inner.exception(), BrokenProcessPool):
+            # Workers failed to start or died (e.g. spawn under an embedded server
+            # such as mod_wsgi, where sys.executable is not Python), or the pool
+            # was shut down with this job queued: run it in-process instead.
+            _pool_unavailable = True
+            _shutdown_pool()
+            threading.Thread(
+                target=_run_inline,
+                args=(outer, input_path, mime, cache_dir),
+                name="image-optimize-inline",
+                daemon=True,
+            ).start()
+            return
+        exc = inner.exception()
+        if exc is not None:
+            outer.set_exception(exc)
+        else:
+            outer.set_result(inner.result())
+
+    inner.add_done_callback(_done)
+    return outer
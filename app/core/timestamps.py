@@ -0,0 +1,28 @@
+"""UTC timestamp strings for DB rows and Bluesky records.
+
+Formatted straight from `time.time_ns()`: no `datetime` objects, and always
+with microseconds (`datetime.isoformat()` drops them when they are zero).
+"""
+
+from __future__ import annotations
+
+import time
+
+
+def _utc_now_base() -> str:
+    secs, ns = divmod(time.time_ns(), 1_000_000_000)
+    t = time.gmtime(secs)
+    return (
+        f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}"
+        f"T{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}.{ns // 1000:06d}"
+    )
+
+
+def utc_now_iso() -> str:
+    """Example: 2026-01-17T18:03:12.123456+00:00"""
+    return _utc_now_base() + "+00:00"
+
+
+def utc_now_iso_z() -> str:
+    """Example: 2026-01-17T18:03:12.123456Z"""
+    return _utc_now_base() + "Z"
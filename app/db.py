@@ -2,6 +2,20 @@
 
 The DB layer was moved to the `app.db` package (see `app/db/db.py`).
 This module remains to avoid breakage for any early adopters importing `app.db`.
+Names are resolved lazily (PEP 562), so importing it does not pull in sqlite3.
 """
 
-from app.db.db import *  # noqa: F403
+from __future__ import annotations
+
+from typing import Any
+
+
+def __getattr__(name: str) -> Any:
+    from app.db import db as _db
+
+    try:
+        value = getattr(_db, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    globals()[name] = value
+    return value
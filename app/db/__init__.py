@@ -2,23 +2,55 @@
 
 - Migration/init logic lives in `app.db.db`.
 - This package is intentionally small and explicit.
+- Names are resolved lazily (PEP 562): `app.db.db` (sqlite3, Flask) is only
+  imported when one of them is first used.
 """
 
-from .db import (  # noqa: F401
-    MediaItem,
-    PlanItem,
-    ProjectItem,
-    delete_media,
-    get_project,
-    get_db,
-    get_media,
-    init_db,
-    insert_project,
-    insert_media,
-    insert_plan,
-    list_media,
-    list_projects,
-    list_plans_for_project,
-    get_plan_for_project,
-    ensure_default_project,
-)
+from __future__ import annotations
+
+from typing import Any
+
+__all__ = [
+    "GenerateJobItem",
+    "MediaItem",
+    "PlanBatchItem",
+    "PlanItem",
+    "PlanSummaryItem",
+    "ProjectItem",
+    "delete_media",
+    "get_project",
+    "get_db",
+    "get_media",
+    "get_media_by_ids",
+    "init_db",
+    "insert_project",
+    "insert_media",
+    "bulk_insert_media",
+    "insert_plan",
+    "list_media",
+    "list_media_rows",
+    "list_projects",
+    "list_projects_json",
+    "list_plans_for_project",
+    "list_plan_summaries_for_project",
+    "get_plan_for_project",
+    "ensure_default_project",
+    "insert_plan_batch",
+    "get_plan_batch",
+    "update_plan_batch_status",
+    "insert_generate_job",
+    "get_generate_job",
+    "finish_generate_job",
+    "prune_generate_jobs",
+    "transaction",
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from . import db as _db
+
+    value = getattr(_db, name)
+    globals()[name] = value
+    return value
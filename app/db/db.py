@@ -1,24 +1,49 @@
 from __future__ import annotations
 
+import atexit
+import os
 import sqlite3
-from dataclasses import dataclass
-from datetime import datetime, timezone
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, NamedTuple
 
 from flask import Flask, g
 
+from app.core.timestamps import utc_now_iso as _utc_now_iso
+
 
 DEFAULT_IMPORTED_PROJECT_TITLE = "Imported Workspace"
 
 
-def _utc_now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+class _Connection(sqlite3.Connection):
+    # Set by `ensure_default_project` once the id is committed.
+    default_project_id: int | None = None
+
+
+# Prepared statements kept per connection (sqlite3 default: 128). Pooled
+# connections live for the whole process, so leave headroom for every query.
+_STATEMENT_CACHE_SIZE = 256
 
 
 def _connect(database_path: str) -> sqlite3.Connection:
-    conn = sqlite3.connect(database_path)
+    conn = sqlite3.connect(database_path, factory=_Connection, cached_statements=_STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
-    # Enforce FK constraints for this connection.
-    conn.execute("PRAGMA foreign_keys = ON")
+    # WAL + synchronous=NORMAL: readers don't block the writer and commits skip
+    # the per-transaction fsync (still durable across app crashes). Each request
+    # opens its own connection, so wait on locks instead of failing immediately.
+    # foreign_keys is per-connection and enforces FK constraints.
+    conn.executescript(
+        """
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        PRAGMA temp_store = MEMORY;
+        PRAGMA cache_size = -16000;
+        PRAGMA mmap_size = 268435456;
+        PRAGMA busy_timeout = 5000;
+        PRAGMA foreign_keys = ON;
+        """
+    )
     return conn
 
 
@@ -35,95 +60,254 @@ def column_exists(conn: sqlite3.Connection, table_name: str, column_name: str) -
     return any(r["name"] == column_name for r in rows)
 
 
+def column_is_not_null(conn: sqlite3.Connection, table_name: str, column_name: str) -> bool:
+    rows = conn.execute(f"PRAGMA table_info({table_name})").fetchall()
+    return any(r["name"] == column_name and r["notnull"] for r in rows)
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Group writes into one BEGIN IMMEDIATE ... COMMIT (rolled back on error).
+
+    Pass `commit=False` to the write helpers inside the block. If a transaction
+    is already open, the block joins it and leaves committing to its owner.
+    """
+
+    if conn.in_transaction:
+        yield conn
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
 def migrate(conn: sqlite3.Connection) -> None:
     """Pragmatic, idempotent migrations.
 
     Rules:
     - If `projects` table doesn't exist, create it.
     - If `plans` table doesn't exist, create it.
+    - If `plan_batches` table doesn't exist, create it.
+    - If `generate_jobs` table doesn't exist, create it.
     - If `media` lacks `project_id`, add it (nullable), then backfill with a default project.
+    - If `media.project_id` is nullable, rebuild `media` with it NOT NULL (SQLite's
+      ALTER TABLE cannot add the constraint in place). Runs once per database.
+    - Ensure the (project_id, id DESC) indexes on `media` and `plans` exist.
 
-    We keep the DB column nullable to avoid SQLite ALTER TABLE limitations, but enforce
-    NOT NULL by application logic.
+    Everything runs in a single BEGIN IMMEDIATE transaction.
     """
 
-    # Base table (for brand-new installs or very old installs).
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS media (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            original_name TEXT NOT NULL,
-            stored_name TEXT NOT NULL,
-            content_type TEXT,
-            size_bytes INTEGER NOT NULL,
-            created_at TEXT NOT NULL
-        )
-        """
-    )
-
-    if not table_exists(conn, "projects"):
+    # One transaction for the whole migration: atomic, and a single commit.
+    with transaction(conn):
+        # Base table (for brand-new installs or very old installs).
         conn.execute(
             """
-            CREATE TABLE projects (
+            CREATE TABLE IF NOT EXISTS media (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
+                original_name TEXT NOT NULL,
+                stored_name TEXT NOT NULL,
+                content_type TEXT,
+                size_bytes INTEGER NOT NULL,
                 created_at TEXT NOT NULL,
-                title TEXT NOT NULL,
-                intent_text TEXT
+                project_id INTEGER NOT NULL
             )
             """
         )
 
-    if not table_exists(conn, "plans"):
-        conn.execute(
-            """
-            CREATE TABLE plans (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                project_id INTEGER NOT NULL,
-                created_at TEXT NOT NULL,
-                model TEXT NOT NULL,
-                plan_json TEXT NOT NULL,
-                FOREIGN KEY(project_id) REFERENCES projects(id)
+        if not table_exists(conn, "projects"):
+            conn.execute(
+                """
+                CREATE TABLE projects (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    intent_text TEXT
+                )
+                """
             )
-            """
-        )
 
-    # Add project_id to media if missing.
-    if not column_exists(conn, "media", "project_id"):
-        conn.execute("ALTER TABLE media ADD COLUMN project_id INTEGER NULL")
+        if not table_exists(conn, "plans"):
+            conn.execute(
+                """
+                CREATE TABLE plans (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    project_id INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    plan_json TEXT NOT NULL,
+                    FOREIGN KEY(project_id) REFERENCES projects(id)
+                )
+                """
+            )
 
-        default_project_id = ensure_default_project(conn)
-        conn.execute(
-            "UPDATE media SET project_id = ? WHERE project_id IS NULL",
-            (default_project_id,),
+        if not table_exists(conn, "plan_batches"):
+            conn.execute(
+                """
+                CREATE TABLE plan_batches (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    project_id INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    batch_id TEXT NOT NULL UNIQUE,
+                    status TEXT NOT NULL,
+                    targets_json TEXT NOT NULL,
+                    output_file_id TEXT,
+                    FOREIGN KEY(project_id) REFERENCES projects(id)
+                )
+                """
+            )
+
+        if not table_exists(conn, "generate_jobs"):
+            conn.execute(
+                """
+                CREATE TABLE generate_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    project_id INTEGER NOT NULL,
+                    created_at TEXT NOT NULL,
+                    job_id TEXT NOT NULL UNIQUE,
+                    status TEXT NOT NULL,
+                    http_status INTEGER,
+                    body TEXT,
+                    FOREIGN KEY(project_id) REFERENCES projects(id)
+                )
+                """
+            )
+
+        # Add project_id to media if missing.
+        if not column_exists(conn, "media", "project_id"):
+            conn.execute("ALTER TABLE media ADD COLUMN project_id INTEGER NULL")
+
+        # On already-migrated DBs this still ensures there's at least one project.
+        default_project_id = ensure_default_project(conn, commit=False)
+        if not column_is_not_null(conn, "media", "project_id"):
+            conn.execute(
+                "UPDATE media SET project_id = ? WHERE project_id IS NULL",
+                (default_project_id,),
+            )
+            _rebuild_media_with_not_null_project_id(conn)
+
+        # Inserts store content_type lowercased; bring older rows in line so
+        # readers can compare it directly.
+        conn.execute("UPDATE media SET content_type = lower(content_type) WHERE content_type <> lower(content_type)")
+
+        # Per-project listings filter on project_id and sort by id DESC; these
+        # indexes serve both (no table scan, no sort step).
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_media_project_id_id ON media(project_id, id DESC)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_plans_project_id_id ON plans(project_id, id DESC)")
+
+    # Seed query-planner statistics for the tables/indexes just created.
+    conn.execute("PRAGMA optimize")
+
+
+def _rebuild_media_with_not_null_project_id(conn: sqlite3.Connection) -> None:
+    # Must run inside the migration transaction, after the NULL backfill.
+    # Keeps ids and the AUTOINCREMENT high-water mark; indexes are recreated by `migrate`.
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'media'").fetchone()
+    conn.execute(
+        """
+        CREATE TABLE media_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            original_name TEXT NOT NULL,
+            stored_name TEXT NOT NULL,
+            content_type TEXT,
+            size_bytes INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            project_id INTEGER NOT NULL
         )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO media_new (id, original_name, stored_name, content_type, size_bytes, created_at, project_id)
+        SELECT id, original_name, stored_name, content_type, size_bytes, created_at, project_id FROM media
+        """
+    )
+    conn.execute("DROP TABLE media")
+    conn.execute("ALTER TABLE media_new RENAME TO media")
+    if seq is not None:
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'media'", (seq["seq"],))
 
-    # On already-migrated DBs, still ensure there's at least one project.
-    if table_exists(conn, "projects"):
-        ensure_default_project(conn)
 
-    conn.commit()
+# Database files already migrated by this process (create_app may run many times).
+_MIGRATED_PATHS: set[str] = set()
 
 
-def init_db(app: Flask) -> None:
-    # Run migrations once on startup.
-    conn = _connect(app.config["DATABASE_PATH"])
-    try:
-        migrate(conn)
-    finally:
-        conn.close()
+def init_db(app: Flask, *, force: bool = False) -> None:
+    # Run migrations once per database file per process; `force=True` re-runs them.
+    db_path = app.config["DATABASE_PATH"]
+    key = os.path.abspath(db_path) if db_path and db_path != ":memory:" else None
+    if force or key is None or key not in _MIGRATED_PATHS or not os.path.exists(key):
+        conn = _connect(db_path)
+        try:
+            migrate(conn)
+        finally:
+            conn.close()
+        if key is not None:
+            _MIGRATED_PATHS.add(key)
 
     @app.before_request
     def _open_db() -> None:
-        g._db = _connect(app.config["DATABASE_PATH"])
+        g._db = _pooled_connection(app.config["DATABASE_PATH"])
 
     @app.teardown_request
     def _close_db(_: Exception | None = None) -> None:
         conn2 = getattr(g, "_db", None)
         if conn2 is not None:
-            conn2.close()
+            # The connection stays open for this thread's next request; just make
+            # sure no half-finished transaction leaks into it.
+            if conn2.in_transaction:
+                conn2.rollback()
             g._db = None
 
 
+# Per-thread connections, keyed by database path. SQLite connections must not be
+# shared across threads; a thread's connections are closed when it exits.
+# Long-lived connections run `PRAGMA optimize` at most every
+# `POOLED_OPTIMIZE_INTERVAL_SECONDS` when handed out, and once more on close.
+POOLED_OPTIMIZE_INTERVAL_SECONDS = 60 * 60
+_local = threading.local()
+
+
+def _optimize(conn: sqlite3.Connection) -> None:
+    try:
+        # Cheap; refreshes planner stats only when SQLite thinks it helps.
+        conn.execute("PRAGMA optimize")
+    except sqlite3.Error:
+        pass
+
+
+def _pooled_connection(database_path: str) -> sqlite3.Connection:
+    conns: dict[str, sqlite3.Connection] | None = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+        _local.optimized_at = {}
+    now = time.monotonic()
+    conn = conns.get(database_path)
+    if conn is None:
+        conn = conns[database_path] = _connect(database_path)
+        _local.optimized_at[database_path] = now
+    elif now - _local.optimized_at[database_path] >= POOLED_OPTIMIZE_INTERVAL_SECONDS:
+        _optimize(conn)
+        _local.optimized_at[database_path] = now
+    return conn
+
+
+def close_pooled_connections() -> None:
+    """Close the calling thread's pooled connections."""
+    conns: dict[str, sqlite3.Connection] = getattr(_local, "conns", None) or {}
+    while conns:
+        _, conn = conns.popitem()
+        _optimize(conn)
+        conn.close()
+
+
+atexit.register(close_pooled_connections)
+
+
 def get_db(app: Flask | None = None) -> sqlite3.Connection:
     if hasattr(g, "_db"):
         return g._db  # type: ignore[attr-defined]
@@ -132,16 +316,14 @@ def get_db(app: Flask | None = None) -> sqlite3.Connection:
     return _connect(app.config["DATABASE_PATH"])
 
 
-@dataclass(frozen=True)
-class ProjectItem:
+class ProjectItem(NamedTuple):
     id: int
     created_at: str
     title: str
     intent_text: str | None
 
 
-@dataclass(frozen=True)
-class MediaItem:
+class MediaItem(NamedTuple):
     id: int
     project_id: int
     original_name: str
@@ -151,8 +333,7 @@ class MediaItem:
     created_at: str
 
 
-@dataclass(frozen=True)
-class PlanItem:
+class PlanItem(NamedTuple):
     id: int
     project_id: int
     created_at: str
@@ -160,57 +341,128 @@ class PlanItem:
     plan_json: str
 
 
-def ensure_default_project(conn: sqlite3.Connection) -> int:
-    """Ensure a stable default project exists and return its id."""
+class PlanSummaryItem(NamedTuple):
+    id: int
+    created_at: str
+    model: str
+    is_template: bool
+
+
+class PlanBatchItem(NamedTuple):
+    id: int
+    project_id: int
+    created_at: str
+    batch_id: str
+    status: str
+    targets_json: str
+    output_file_id: str | None
+
+
+class GenerateJobItem(NamedTuple):
+    id: int
+    project_id: int
+    created_at: str
+    job_id: str
+    status: str
+    http_status: int | None
+    body: str | None
+
+
+# Columns selected for each row type, in field order: rows are built with
+# `Item._make(row)`, so the SELECT list must match the NamedTuple fields.
+_PROJECT_COLUMNS = "id, created_at, title, intent_text"
+_MEDIA_COLUMNS = "id, project_id, original_name, stored_name, content_type, size_bytes, created_at"
+_PLAN_COLUMNS = "id, project_id, created_at, model, plan_json"
+_PLAN_BATCH_COLUMNS = "id, project_id, created_at, batch_id, status, targets_json, output_file_id"
+_GENERATE_JOB_COLUMNS = "id, project_id, created_at, job_id, status, http_status, body"
+
+# Read queries, built once. sqlite3 caches prepared statements per connection
+# keyed by SQL text, so pooled connections skip re-parsing these.
+_SQL_LIST_PROJECTS = f"SELECT {_PROJECT_COLUMNS} FROM projects ORDER BY id DESC"
+_SQL_GET_PROJECT = f"SELECT {_PROJECT_COLUMNS} FROM projects WHERE id = ?"
+# Each row as a JSON object text built by SQLite (JSON1), so listings can be
+# spliced into a response without escaping strings in Python.
+_SQL_LIST_PROJECTS_JSON = (
+    "SELECT json_object('id', id, 'title', title, 'intent_text', intent_text, 'created_at', created_at)"
+    " FROM projects ORDER BY id DESC"
+)
+_SQL_LIST_MEDIA = f"SELECT {_MEDIA_COLUMNS} FROM media ORDER BY id DESC"
+_SQL_LIST_PROJECT_MEDIA = f"SELECT {_MEDIA_COLUMNS} FROM media WHERE project_id = ? ORDER BY id DESC"
+_SQL_GET_MEDIA = f"SELECT {_MEDIA_COLUMNS} FROM media WHERE id = ?"
+# Listing projection: what the media list endpoints return (no stored_name).
+_MEDIA_LISTING_COLUMNS = "id, project_id, original_name, content_type, size_bytes, created_at"
+_SQL_LIST_PROJECT_MEDIA_ROWS = (
+    f"SELECT {_MEDIA_LISTING_COLUMNS} FROM media WHERE project_id = ? ORDER BY id DESC"
+)
+# Ids are bound as one JSON array, so the SQL text (and cached statement) is the
+# same for any number of ids and there is no bound-parameter limit.
+_SQL_GET_PROJECT_MEDIA_BY_IDS = (
+    f"SELECT {_MEDIA_COLUMNS} FROM media WHERE project_id = ? AND id IN (SELECT value FROM json_each(?))"
+)
+_SQL_LIST_PLANS = f"SELECT {_PLAN_COLUMNS} FROM plans WHERE project_id = ? ORDER BY id DESC"
+_SQL_GET_PLAN = f"SELECT {_PLAN_COLUMNS} FROM plans WHERE id = ? AND project_id = ?"
+_SQL_GET_PLAN_BATCH = f"SELECT {_PLAN_BATCH_COLUMNS} FROM plan_batches WHERE batch_id = ?"
+_SQL_GET_GENERATE_JOB = f"SELECT {_GENERATE_JOB_COLUMNS} FROM generate_jobs WHERE job_id = ?"
+
+
+def ensure_default_project(conn: sqlite3.Connection, *, commit: bool = True) -> int:
+    """Ensure a stable default project exists and return its id.
+
+    `commit=False` leaves the insert to the caller's transaction (see `transaction`).
+    The id is cached on connections opened by `_connect` once it is committed.
+    """
+    cached = getattr(conn, "default_project_id", None)
+    if cached is not None:
+        return cached
+
     row = conn.execute(
         "SELECT id FROM projects WHERE title = ? ORDER BY id ASC LIMIT 1",
         (DEFAULT_IMPORTED_PROJECT_TITLE,),
     ).fetchone()
     if row is not None:
-        return int(row["id"])
+        project_id = int(row["id"])
+    else:
+        created_at = _utc_now_iso()
+        cur = conn.execute(
+            "INSERT INTO projects (created_at, title, intent_text) VALUES (?, ?, ?)",
+            (created_at, DEFAULT_IMPORTED_PROJECT_TITLE, None),
+        )
+        if commit:
+            conn.commit()
+        project_id = int(cur.lastrowid)
 
-    created_at = _utc_now_iso()
-    cur = conn.execute(
-        "INSERT INTO projects (created_at, title, intent_text) VALUES (?, ?, ?)",
-        (created_at, DEFAULT_IMPORTED_PROJECT_TITLE, None),
-    )
-    conn.commit()
-    return int(cur.lastrowid)
+    # Inside an open transaction the row could still be rolled back.
+    if isinstance(conn, _Connection) and not conn.in_transaction:
+        conn.default_project_id = project_id
+    return project_id
 
 
-def insert_project(conn: sqlite3.Connection, *, title: str, intent_text: str) -> int:
+def insert_project(conn: sqlite3.Connection, *, title: str, intent_text: str, commit: bool = True) -> int:
     created_at = _utc_now_iso()
     cur = conn.execute(
         "INSERT INTO projects (created_at, title, intent_text) VALUES (?, ?, ?)",
         (created_at, title, intent_text),
     )
-    conn.commit()
+    if commit:
+        conn.commit()
     return int(cur.lastrowid)
 
 
 def list_projects(conn: sqlite3.Connection) -> list[ProjectItem]:
-    rows = conn.execute("SELECT * FROM projects ORDER BY id DESC").fetchall()
-    return [
-        ProjectItem(
-            id=int(r["id"]),
-            created_at=str(r["created_at"]),
-            title=str(r["title"]),
-            intent_text=r["intent_text"],
-        )
-        for r in rows
-    ]
+    cur = conn.execute(_SQL_LIST_PROJECTS)
+    return list(map(ProjectItem._make, cur))
+
+
+def list_projects_json(conn: sqlite3.Connection) -> list[str]:
+    """`list_projects` as JSON object texts with `id`, `title`, `intent_text`, `created_at`."""
+    return [row[0] for row in conn.execute(_SQL_LIST_PROJECTS_JSON)]
 
 
 def get_project(conn: sqlite3.Connection, project_id: int) -> ProjectItem | None:
-    r = conn.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+    r = conn.execute(_SQL_GET_PROJECT, (project_id,)).fetchone()
     if r is None:
         return None
-    return ProjectItem(
-        id=int(r["id"]),
-        created_at=str(r["created_at"]),
-        title=str(r["title"]),
-        intent_text=r["intent_text"],
-    )
+    return ProjectItem._make(r)
 
 
 def insert_media(
@@ -221,8 +473,14 @@ def insert_media(
     stored_name: str,
     content_type: str | None,
     size_bytes: int,
-) -> int:
+    commit: bool = True,
+) -> MediaItem:
+    """Insert a media row and return it as stored (no read-back query needed).
+
+    `content_type` is stored lowercased (MIME types are case-insensitive).
+    """
     created_at = _utc_now_iso()
+    content_type = content_type.lower() if content_type else content_type
     cur = conn.execute(
         """
         INSERT INTO media (project_id, original_name, stored_name, content_type, size_bytes, created_at)
@@ -230,119 +488,209 @@ def insert_media(
         """,
         (project_id, original_name, stored_name, content_type, size_bytes, created_at),
     )
-    conn.commit()
-    return int(cur.lastrowid)
+    if commit:
+        conn.commit()
+    return MediaItem(int(cur.lastrowid), project_id, original_name, stored_name, content_type, size_bytes, created_at)
+
+
+def bulk_insert_media(
+    conn: sqlite3.Connection,
+    *,
+    project_id: int,
+    rows: Iterable[tuple[str, str, str | None, int]],
+) -> list[int]:
+    """Insert many media rows in one transaction and return their ids in order.
+
+    Each row is (original_name, stored_name, content_type, size_bytes). Runs inside
+    the caller's transaction if one is open, otherwise commits once at the end.
+    `content_type` is stored lowercased, as in `insert_media`.
+    """
+
+    created_at = _utc_now_iso()
+    params = [(project_id, o, st, ct.lower() if ct else ct, sz, created_at) for (o, st, ct, sz) in rows]
+    if not params:
+        return []
+
+    # IMMEDIATE takes the write lock up front, so the new ids are contiguous.
+    with transaction(conn):
+        conn.executemany(
+            """
+            INSERT INTO media (project_id, original_name, stored_name, content_type, size_bytes, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            params,
+        )
+        last_id = int(conn.execute("SELECT last_insert_rowid()").fetchone()[0])
+    return list(range(last_id - len(params) + 1, last_id + 1))
 
 
 def list_media(conn: sqlite3.Connection, *, project_id: int | None = None) -> list[MediaItem]:
     if project_id is None:
-        rows = conn.execute("SELECT * FROM media ORDER BY id DESC").fetchall()
+        cur = conn.execute(_SQL_LIST_MEDIA)
     else:
-        rows = conn.execute(
-            "SELECT * FROM media WHERE project_id = ? ORDER BY id DESC",
-            (project_id,),
-        ).fetchall()
-
-    items: list[MediaItem] = []
-    for r in rows:
-        pid = r["project_id"]
-        if pid is None:
-            # Legacy data should have been migrated, but keep this defensive.
-            pid = ensure_default_project(conn)
-        items.append(
-            MediaItem(
-                id=int(r["id"]),
-                project_id=int(pid),
-                original_name=str(r["original_name"]),
-                stored_name=str(r["stored_name"]),
-                content_type=r["content_type"],
-                size_bytes=int(r["size_bytes"]),
-                created_at=str(r["created_at"]),
-            )
-        )
-    return items
+        cur = conn.execute(_SQL_LIST_PROJECT_MEDIA, (project_id,))
+
+    return list(map(MediaItem._make, cur))
+
+
+def list_media_rows(conn: sqlite3.Connection, *, project_id: int) -> list[tuple]:
+    """Plain row tuples for listings, newest first:
+    `(id, project_id, original_name, content_type, size_bytes, created_at)`."""
+    cur = conn.cursor()
+    # Plain tuples instead of the connection's sqlite3.Row factory.
+    cur.row_factory = None
+    return cur.execute(_SQL_LIST_PROJECT_MEDIA_ROWS, (project_id,)).fetchall()
+
+
+def get_media_by_ids(conn: sqlite3.Connection, *, project_id: int, media_ids: Iterable[int]) -> dict[int, MediaItem]:
+    """Media rows of `project_id` among `media_ids`, keyed by id (ids not found are absent)."""
+    ids_json = "[" + ",".join(str(int(i)) for i in media_ids) + "]"
+    cur = conn.execute(_SQL_GET_PROJECT_MEDIA_BY_IDS, (project_id, ids_json))
+    return {item.id: item for item in map(MediaItem._make, cur)}
 
 
 def get_media(conn: sqlite3.Connection, media_id: int) -> MediaItem | None:
-    r = conn.execute("SELECT * FROM media WHERE id = ?", (media_id,)).fetchone()
+    r = conn.execute(_SQL_GET_MEDIA, (media_id,)).fetchone()
     if r is None:
         return None
-
-    pid = r["project_id"]
-    if pid is None:
-        pid = ensure_default_project(conn)
-
-    return MediaItem(
-        id=int(r["id"]),
-        project_id=int(pid),
-        original_name=str(r["original_name"]),
-        stored_name=str(r["stored_name"]),
-        content_type=r["content_type"],
-        size_bytes=int(r["size_bytes"]),
-        created_at=str(r["created_at"]),
-    )
+    return MediaItem._make(r)
 
 
-def delete_media(conn: sqlite3.Connection, *, media_id: int) -> None:
+def delete_media(conn: sqlite3.Connection, *, media_id: int, commit: bool = True) -> None:
     conn.execute("DELETE FROM media WHERE id = ?", (media_id,))
-    conn.commit()
+    if commit:
+        conn.commit()
 
 
-def insert_plan(conn: sqlite3.Connection, *, project_id: int, model: str, plan_json: str) -> int:
+def insert_plan(
+    conn: sqlite3.Connection,
+    *,
+    project_id: int,
+    model: str,
+    plan_json: str,
+    commit: bool = True,
+) -> int:
     created_at = _utc_now_iso()
     cur = conn.execute(
         "INSERT INTO plans (project_id, created_at, model, plan_json) VALUES (?, ?, ?, ?)",
         (project_id, created_at, model, plan_json),
     )
-    conn.commit()
+    if commit:
+        conn.commit()
     return int(cur.lastrowid)
 
 
 def list_plans_for_project(conn: sqlite3.Connection, *, project_id: int) -> list[PlanItem]:
-    rows = conn.execute(
-        "SELECT * FROM plans WHERE project_id = ? ORDER BY id DESC",
-        (project_id,),
-    ).fetchall()
-    return [
-        PlanItem(
-            id=int(r["id"]),
-            project_id=int(r["project_id"]),
-            created_at=str(r["created_at"]),
-            model=str(r["model"]),
-            plan_json=str(r["plan_json"]),
-        )
-        for r in rows
-    ]
+    cur = conn.execute(_SQL_LIST_PLANS, (project_id,))
+    return list(map(PlanItem._make, cur))
 
 
 def get_plan_for_project(conn: sqlite3.Connection, *, project_id: int, plan_id: int) -> PlanItem | None:
-    r = conn.execute(
-        "SELECT * FROM plans WHERE id = ? AND project_id = ?",
-        (plan_id, project_id),
-    ).fetchone()
+    r = conn.execute(_SQL_GET_PLAN, (plan_id, project_id)).fetchone()
     if r is None:
         return None
-    return PlanItem(
-        id=int(r["id"]),
-        project_id=int(r["project_id"]),
-        created_at=str(r["created_at"]),
-        model=str(r["model"]),
-        plan_json=str(r["plan_json"]),
-    )
+    return PlanItem._make(r)
 
 
-def list_plans_for_project(conn: sqlite3.Connection, *, project_id: int) -> list[PlanItem]:
-    rows = conn.execute(
-        "SELECT * FROM plans WHERE project_id = ? ORDER BY id DESC",
+def list_plan_summaries_for_project(conn: sqlite3.Connection, *, project_id: int) -> list[PlanSummaryItem]:
+    """Plan list rows without `plan_json`; `meta.is_template` is read via JSON1."""
+    cur = conn.execute(
+        """
+        SELECT id, created_at, model,
+               CASE WHEN json_valid(plan_json) THEN json_extract(plan_json, '$.meta.is_template') END
+        FROM plans WHERE project_id = ? ORDER BY id DESC
+        """,
         (project_id,),
-    ).fetchall()
-    return [
-        PlanItem(
-            id=int(r["id"]),
-            project_id=int(r["project_id"]),
-            created_at=str(r["created_at"]),
-            model=str(r["model"]),
-            plan_json=str(r["plan_json"]),
-        )
-        for r in rows
-    ]
+    )
+    return [PlanSummaryItem(r[0], r[1], r[2], bool(r[3])) for r in cur]
+
+
+def insert_plan_batch(
+    conn: sqlite3.Connection,
+    *,
+    project_id: int,
+    batch_id: str,
+    status: str,
+    targets_json: str,
+    commit: bool = True,
+) -> int:
+    created_at = _utc_now_iso()
+    cur = conn.execute(
+        """
+        INSERT INTO plan_batches (project_id, created_at, batch_id, status, targets_json)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (project_id, created_at, batch_id, status, targets_json),
+    )
+    if commit:
+        conn.commit()
+    return int(cur.lastrowid)
+
+
+def get_plan_batch(conn: sqlite3.Connection, *, batch_id: str) -> PlanBatchItem | None:
+    r = conn.execute(_SQL_GET_PLAN_BATCH, (batch_id,)).fetchone()
+    if r is None:
+        return None
+    return PlanBatchItem._make(r)
+
+
+def update_plan_batch_status(
+    conn: sqlite3.Connection,
+    *,
+    batch_id: str,
+    status: str,
+    output_file_id: str | None = None,
+    commit: bool = True,
+) -> None:
+    conn.execute(
+        "UPDATE plan_batches SET status = ?, output_file_id = COALESCE(?, output_file_id) WHERE batch_id = ?",
+        (status, output_file_id, batch_id),
+    )
+    if commit:
+        conn.commit()
+
+
+def insert_generate_job(conn: sqlite3.Connection, *, project_id: int, job_id: str, commit: bool = True) -> int:
+    created_at = _utc_now_iso()
+    cur = conn.execute(
+        "INSERT INTO generate_jobs (project_id, created_at, job_id, status) VALUES (?, ?, ?, 'pending')",
+        (project_id, created_at, job_id),
+    )
+    if commit:
+        conn.commit()
+    return int(cur.lastrowid)
+
+
+def get_generate_job(conn: sqlite3.Connection, *, job_id: str) -> GenerateJobItem | None:
+    r = conn.execute(_SQL_GET_GENERATE_JOB, (job_id,)).fetchone()
+    if r is None:
+        return None
+    return GenerateJobItem._make(r)
+
+
+def finish_generate_job(
+    conn: sqlite3.Connection,
+    *,
+    job_id: str,
+    status: str,
+    http_status: int | None = None,
+    body: str | None = None,
+    commit: bool = True,
+) -> None:
+    conn.execute(
+        "UPDATE generate_jobs SET status = ?, http_status = ?, body = ? WHERE job_id = ?",
+        (status, http_status, body, job_id),
+    )
+    if commit:
+        conn.commit()
+
+
+def prune_generate_jobs(conn: sqlite3.Connection, *, keep: int, commit: bool = True) -> None:
+    """Delete all but the `keep` most recently created jobs."""
+
+    conn.execute(
+        "DELETE FROM generate_jobs WHERE id <= (SELECT max(id) FROM generate_jobs) - ?",
+        (keep,),
+    )
+    if commit:
+        conn.commit()
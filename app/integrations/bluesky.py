@@ -1,17 +1,33 @@
 from __future__ import annotations
 
-import json
 import re
 from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any
+from typing import Any, BinaryIO
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.core import fastjson
+from app.core.timestamps import utc_now_iso_z
 
 
 BSKY_BASE = "https://bsky.social"
 
 
+def _build_http_session() -> requests.Session:
+    # One keep-alive pool for all XRPC calls: login -> N blob uploads -> createRecord
+    # share a TLS connection. Only connection failures are retried (nothing was
+    # sent yet); POSTs like createRecord are not idempotent, so no status retries.
+    session = requests.Session()
+    retry = Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.3)
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+    return session
+
+
+_session = _build_http_session()
+
+
 @dataclass(frozen=True)
 class BlueskyPostResult:
     uri: str
@@ -22,7 +38,21 @@ class BlueskyAPIError(RuntimeError):
     pass
 
 
-_URL_RE = re.compile(r"https?://[^\s]+")
+_URL_RE = re.compile(r"https?://\S+")
+# Common trailing punctuation that shouldn't be part of the URL.
+_URL_TRAILING_PUNCT = ").,;:!?]\"'"
+
+
+def _link_facet(byte_start: int, byte_end: int, uri: str) -> dict[str, Any]:
+    return {
+        "index": {"byteStart": byte_start, "byteEnd": byte_end},
+        "features": [
+            {
+                "$type": "app.bsky.richtext.facet#link",
+                "uri": uri,
+            }
+        ],
+    }
 
 
 def build_link_facets(text: str) -> list[dict[str, Any]]:
@@ -34,61 +64,59 @@ def build_link_facets(text: str) -> list[dict[str, Any]]:
     NOTE: facet byte offsets are UTF-8 byte indices.
     """
 
-    if not text:
+    if not text or "://" not in text:
         return []
 
-    facets: list[dict[str, Any]] = []
+    if text.isascii():
+        # One byte per character: match offsets are already byte offsets.
+        facets: list[dict[str, Any]] = []
+        for m in _URL_RE.finditer(text):
+            trimmed = m.group(0).rstrip(_URL_TRAILING_PUNCT)
+            start = m.start(0)
+            facets.append(_link_facet(start, start + len(trimmed), trimmed))
+        return facets
+
+    facets = []
+    # Running (char, byte) position: only the text between matches is encoded,
+    # so computing offsets is linear in the text length.
+    pos = 0
+    byte_pos = 0
     for m in _URL_RE.finditer(text):
-        url = m.group(0)
-        # Trim common trailing punctuation that shouldn't be part of the URL.
-        trimmed = url.rstrip(").,;:!?]\"'")
-        if not trimmed:
-            continue
-
+        trimmed = m.group(0).rstrip(_URL_TRAILING_PUNCT)
         start = m.start(0)
-        end = start + len(trimmed)
 
-        byte_start = len(text[:start].encode("utf-8"))
-        byte_end = len(text[:end].encode("utf-8"))
+        byte_start = byte_pos + len(text[pos:start].encode("utf-8"))
+        byte_end = byte_start + len(trimmed.encode("utf-8"))
+        pos, byte_pos = start + len(trimmed), byte_end
 
-        facets.append(
-            {
-                "index": {"byteStart": byte_start, "byteEnd": byte_end},
-                "features": [
-                    {
-                        "$type": "app.bsky.richtext.facet#link",
-                        "uri": trimmed,
-                    }
-                ],
-            }
-        )
+        facets.append(_link_facet(byte_start, byte_end, trimmed))
 
     return facets
 
 
-def _utc_iso_z() -> str:
-    # Example: 2026-01-17T18:03:12.123456Z
-    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+# Error bodies are echoed into user-facing messages; keep them bounded.
+_ERROR_TEXT_MAX_CHARS = 512
 
 
 def _clean_error_message(resp: requests.Response) -> str:
     """Best-effort extraction of a useful error message (no secrets)."""
     try:
-        payload = resp.json()
-        if isinstance(payload, dict):
-            err = payload.get("error")
-            if isinstance(err, dict):
-                # OpenAI-style wrapper isn't expected here, but keep generic.
-                msg = err.get("message")
-                if isinstance(msg, str) and msg.strip():
-                    return msg.strip()
-            msg = payload.get("message")
+        payload = fastjson.loads(resp.content)
+    except ValueError:
+        payload = None
+    if isinstance(payload, dict):
+        err = payload.get("error")
+        if isinstance(err, dict):
+            # OpenAI-style wrapper isn't expected here, but keep generic.
+            msg = err.get("message")
             if isinstance(msg, str) and msg.strip():
                 return msg.strip()
-        return json.dumps(payload)
-    except Exception:
-        text = (resp.text or "").strip()
-        return text if text else f"HTTP {resp.status_code}"
+        msg = payload.get("message")
+        if isinstance(msg, str) and msg.strip():
+            return msg.strip()
+    # No message field: show the raw body (truncated) instead of re-serializing it.
+    text = (resp.text or "").strip()
+    return text[:_ERROR_TEXT_MAX_CHARS] if text else f"HTTP {resp.status_code}"
 
 
 def create_session(*, identifier: str, app_password: str) -> tuple[str, str]:
@@ -97,7 +125,7 @@ def create_session(*, identifier: str, app_password: str) -> tuple[str, str]:
     Returns (accessJwt, did). Caller must not persist them.
     """
     url = f"{BSKY_BASE}/xrpc/com.atproto.server.createSession"
-    resp = requests.post(url, json={"identifier": identifier, "password": app_password}, timeout=30)
+    resp = _session.post(url, json={"identifier": identifier, "password": app_password}, timeout=30)
     if resp.status_code != 200:
         raise BlueskyAPIError(f"Bluesky login failed: {_clean_error_message(resp)}")
 
@@ -111,13 +139,14 @@ def create_session(*, identifier: str, app_password: str) -> tuple[str, str]:
     return access_jwt, did
 
 
-def upload_blob(*, access_jwt: str, content_type: str, data: bytes) -> dict[str, Any]:
+def upload_blob(*, access_jwt: str, content_type: str, data: bytes | BinaryIO) -> dict[str, Any]:
+    """Upload a blob; `data` may be bytes or a binary file object (streamed, not read into memory)."""
     url = f"{BSKY_BASE}/xrpc/com.atproto.repo.uploadBlob"
     headers = {
         "Authorization": f"Bearer {access_jwt}",
         "Content-Type": content_type,
     }
-    resp = requests.post(url, headers=headers, data=data, timeout=60)
+    resp = _session.post(url, headers=headers, data=data, timeout=60)
     if resp.status_code != 200:
         raise BlueskyAPIError(f"Bluesky upload failed: {_clean_error_message(resp)}")
 
@@ -144,7 +173,7 @@ def create_post_with_images(
 
     record = {
         "text": text,
-        "createdAt": _utc_iso_z(),
+        "createdAt": utc_now_iso_z(),
         "embed": {
             "$type": "app.bsky.embed.images",
             "images": images,
@@ -160,7 +189,9 @@ def create_post_with_images(
         "record": record,
     }
 
-    resp = requests.post(url, headers=headers, json=payload, timeout=30)
+    # Compact UTF-8 body: `json=` would pad separators and \u-escape non-ASCII
+    # text (emoji cost 12 bytes instead of 4).
+    resp = _session.post(url, headers=headers, data=fastjson.dumps_bytes(payload), timeout=30)
     if resp.status_code != 200:
         raise BlueskyAPIError(f"Bluesky post failed: {_clean_error_message(resp)}")
 
@@ -4,17 +4,19 @@ from dataclasses import dataclass
 from typing import Any
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class BlueskyPlan:
     text: str
-    hashtags: list[str]
-    alt_text: list[str]
+    hashtags: tuple[str, ...]
+    alt_text: tuple[str, ...]
 
 
 def from_canonical(plan: dict[str, Any]) -> BlueskyPlan:
+    # Plans reaching here passed `validate_plan` (or came from the template
+    # planner), so list items are already strings; copy without re-coercing.
     b = plan["bluesky"]
     return BlueskyPlan(
         text=str(b["text"]),
-        hashtags=[str(x) for x in b["hashtags"]],
-        alt_text=[str(x) for x in b["alt_text"]],
+        hashtags=tuple(b["hashtags"]),
+        alt_text=tuple(b["alt_text"]),
     )
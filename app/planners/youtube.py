@@ -4,19 +4,20 @@ from dataclasses import dataclass
 from typing import Any
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class YouTubePlan:
     title: str
     description: str
-    tags: list[str]
+    tags: tuple[str, ...]
     category: str
 
 
 def from_canonical(plan: dict[str, Any]) -> YouTubePlan:
+    # See `app.planners.bluesky.from_canonical`: tags are validated strings.
     y = plan["youtube"]
     return YouTubePlan(
         title=str(y["title"]),
         description=str(y["description"]),
-        tags=[str(x) for x in y["tags"]],
+        tags=tuple(y["tags"]),
         category=str(y["category"]),
     )
@@ -0,0 +1,45 @@
+"""Flask JSON provider backed by `app.core.fastjson` (orjson when installed).
+
+Installed on the app in `create_app`, so every `jsonify(...)` and
+`request.get_json()` goes through it without touching the views.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+from app.core import fastjson
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    # API clients don't rely on key order; skipping the sort keeps the fast path cheap.
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs or fastjson.orjson is None:
+            return super().dumps(obj, **kwargs)
+        try:
+            return fastjson.dumps(obj)
+        except TypeError:
+            # Types orjson doesn't handle natively (NamedTuple, Decimal, non-str keys, ...).
+            return super().dumps(obj)
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return fastjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        if pretty or fastjson.orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        try:
+            body = fastjson.dumps_bytes(obj)
+        except TypeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
@@ -3,32 +3,61 @@ from __future__ import annotations
 import json
 import os
 import re
+import threading
 import uuid
-from pathlib import Path
+from collections import OrderedDict
 from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from pathlib import Path
 
-from flask import Blueprint, Response, current_app, g, jsonify, render_template, request, send_from_directory
+from flask import (
+    Blueprint,
+    Response,
+    copy_current_request_context,
+    current_app,
+    g,
+    jsonify,
+    render_template,
+    request,
+    send_from_directory,
+    stream_with_context,
+)
 from werkzeug.utils import secure_filename
 
-from app.ai.client import AIClient
-from app.ai.plan_validation import validate_plan
+from app.ai.client import AIClient, PlanGenerationResult
+from app.ai.plan_validation import is_str_list, validate_plan
 from app.db import (
     ensure_default_project,
     delete_media,
+    finish_generate_job,
+    get_generate_job,
     get_media,
+    get_db,
+    get_media_by_ids,
     get_project,
     insert_media,
     insert_plan,
     insert_project,
-    list_media,
-    list_projects,
-    list_plans_for_project,
+    list_media_rows,
+    list_projects_json,
+    list_plan_summaries_for_project,
     get_plan_for_project,
+    insert_generate_job,
+    prune_generate_jobs,
+    transaction,
 )
 from app.planners.bluesky import from_canonical as bluesky_from_canonical
 from app.planners.youtube import from_canonical as youtube_from_canonical
 from app.integrations.bluesky import BlueskyAPIError, build_link_facets, create_post_with_images, create_session, upload_blob
-from app.core.image_optimize import BSKY_MAX_IMAGE_BYTES, ImageOptimizationError, optimize_for_bluesky
+from app.core import fastjson
+from app.core.image_optimize import (
+    BSKY_MAX_IMAGE_BYTES,
+    OPTIMIZE_CACHE_DIRNAME,
+    OPTIMIZE_TIMEOUT_SECONDS,
+    ImageOptimizationError,
+    optimize_for_bluesky_async,
+)
 
 
 web = Blueprint("web", __name__)
@@ -99,8 +128,218 @@ def _normalize_and_validate_cta_target(raw: str | None) -> tuple[str | None, str
         return None, "Enter an @handle or a full URL (https://…)."
 
 
-def _utc_iso_z() -> str:
-    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+# Runs of 3+ letters/digits (Unicode-aware, same as `str.isalnum`; `_` excluded).
+_KEYWORD_TOKEN_RE = re.compile(r"[^\W_]{3,}")
+_KEYWORD_STOPWORDS = frozenset(
+    {
+        "the", "a", "an", "and", "or", "to", "for", "of", "in", "on",
+        "with", "my", "your", "our", "this", "that", "is", "are", "it", "as",
+    }
+)
+
+
+def _simple_keywords(text: str) -> list[str]:
+    # Very light keyword extraction: split on non-alnum, keep unique tokens (first-seen order).
+    tokens = dict.fromkeys(_KEYWORD_TOKEN_RE.findall(text.lower()))
+    return [t for t in tokens if t not in _KEYWORD_STOPWORDS]
+
+
+# `Focus:` / `Audience:` / `Tone:` builder lines, found in one scan. Line breaks
+# and trimmed whitespace match `str.splitlines()` / `str.strip()`; key case is
+# folded for ASCII only, like `str.lower()` on these keys.
+_LINE_BREAK_CHARS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+_BUILDER_FIELD_RE = re.compile(
+    rf"(?:\A|(?<=[{_LINE_BREAK_CHARS}]))[^\S{_LINE_BREAK_CHARS}]*(?ai:(focus|audience|tone)):([^{_LINE_BREAK_CHARS}]*)"
+)
+
+
+def _parse_builder_fields(text: str) -> tuple[str, str | None, str | None]:
+    # Last line wins per key. Focus is "" when missing; callers pick the fallback.
+    fields = {key.lower(): value.strip() for key, value in _BUILDER_FIELD_RE.findall(text or "")}
+    return fields.get("focus", ""), fields.get("audience") or None, fields.get("tone") or None
+
+
+# Template drafts are a pure function of the builder inputs, so "regenerate" with
+# unchanged inputs reuses the validated plan. Values are plan JSON text; callers
+# parse a fresh copy.
+_TEMPLATE_PLAN_CACHE_SIZE = 512
+_template_plan_cache: OrderedDict[tuple, str] = OrderedDict()
+_template_plan_cache_lock = threading.Lock()
+
+
+def _template_plan_cache_get(key: tuple) -> str | None:
+    with _template_plan_cache_lock:
+        plan_json = _template_plan_cache.get(key)
+        if plan_json is not None:
+            _template_plan_cache.move_to_end(key)
+        return plan_json
+
+
+def _template_plan_cache_put(key: tuple, plan_json: str) -> None:
+    with _template_plan_cache_lock:
+        _template_plan_cache[key] = plan_json
+        _template_plan_cache.move_to_end(key)
+        while len(_template_plan_cache) > _TEMPLATE_PLAN_CACHE_SIZE:
+            _template_plan_cache.popitem(last=False)
+
+
+# Plans are write-once, so a plan's detail body never changes once built.
+# Keyed by (DATABASE_PATH, project_id, plan_id).
+_PLAN_DETAIL_CACHE_SIZE = 512
+_plan_detail_cache: OrderedDict[tuple, bytes] = OrderedDict()
+_plan_detail_cache_lock = threading.Lock()
+
+
+def _plan_detail_cache_get(key: tuple) -> bytes | None:
+    with _plan_detail_cache_lock:
+        body = _plan_detail_cache.get(key)
+        if body is not None:
+            _plan_detail_cache.move_to_end(key)
+        return body
+
+
+def _plan_detail_cache_put(key: tuple, body: bytes) -> None:
+    with _plan_detail_cache_lock:
+        _plan_detail_cache[key] = body
+        _plan_detail_cache.move_to_end(key)
+        while len(_plan_detail_cache) > _PLAN_DETAIL_CACHE_SIZE:
+            _plan_detail_cache.popitem(last=False)
+
+
+# Substring match (no word boundaries), as a single scan. Longer phrases such as
+# "video production" or "video editing" are covered by their shorter keyword.
+_PRODUCTION_FOCUS_RE = re.compile(
+    r"production|producer|editing|filming|cinematography|recording|mixing|mastering|sound design|beat|studio"
+)
+
+
+def _is_production_related_focus(text: str) -> bool:
+    return _PRODUCTION_FOCUS_RE.search((text or "").lower()) is not None
+
+
+def _normalize_hashtag_token(tag: str) -> str:
+    # Drops one leading '#' only; callers decide what to do with any other '#'.
+    return (tag or "").strip().removeprefix("#").strip()
+
+
+# Generic Bluesky hashtags dropped unless the focus is about production work.
+_BANNED_GENERIC_HASHTAGS = frozenset({"creators", "content", "producers"})
+# Too vague to lead with; template mode skips them as keyword candidates.
+_DISCOURAGED_HASHTAGS = frozenset({"update", "project", "demo", "behindthescenes", "build", "new"})
+# Generic, but allowed as a last resort when they come from the focus line.
+_ALLOWED_GENERIC_HASHTAGS = frozenset({"makers", "artists"})
+# Stable specific tags used to top up short hashtag lists (in order).
+_FALLBACK_HASHTAGS = ("bluesky", "flask", "opensource", "atproto", "helpmepost")
+_FALLBACK_HASHTAGS_CAMEL = ("Bluesky", "Flask", "OpenSource", "ATProto", "HelpMePost")
+
+
+# Inline hashtags, stripped before the canonical hashtag line is appended.
+_INLINE_HASHTAG_RE = re.compile(r"(?<!\\w)#([A-Za-z0-9_]+)")
+# Runs of spaces/tabs and of 3+ newlines never overlap, so one pass collapses both.
+_BLANK_RUN_RE = re.compile(r"[ \t]{2,}|\n{3,}")
+
+
+def _collapse_blank_run(m: re.Match[str]) -> str:
+    return "\n\n" if m.group()[0] == "\n" else " "
+
+
+# Copy uploads in large chunks (FileStorage.save defaults to 16 KiB reads).
+_UPLOAD_COPY_BUFFER_SIZE = 1 << 20
+
+
+def _save_upload(f, dst: str) -> int:
+    """Write an uploaded file to `dst`; returns the number of bytes written."""
+    size = 0
+    with open(dst, "wb") as out:
+        while chunk := f.stream.read(_UPLOAD_COPY_BUFFER_SIZE):
+            out.write(chunk)
+            size += len(chunk)
+    return size
+
+
+# Rows serialized per chunk by `_json_items_response`.
+_ITEMS_STREAM_BATCH = 256
+
+
+def _json_items_response(rows: list, to_item) -> Response:
+    """`{"items": [...]}` serialized in batches while the response is sent,
+    so the whole body is never built in memory at once."""
+
+    def _chunks():
+        yield b'{"items":['
+        sep = b""
+        for start in range(0, len(rows), _ITEMS_STREAM_BATCH):
+            batch = fastjson.dumps_bytes([to_item(r) for r in rows[start : start + _ITEMS_STREAM_BATCH]])
+            yield sep + batch[1:-1]
+            sep = b","
+        yield b"]}\n"
+
+    return Response(_chunks(), mimetype="application/json")
+
+
+def _json_items_text_response(items_json: list[str]) -> Response:
+    """Like `_json_items_response`, for items already serialized to JSON text."""
+
+    def _chunks():
+        yield b'{"items":['
+        for start in range(0, len(items_json), _ITEMS_STREAM_BATCH):
+            batch = ",".join(items_json[start : start + _ITEMS_STREAM_BATCH]).encode("utf-8")
+            yield b"," + batch if start else batch
+        yield b"]}\n"
+
+    return Response(_chunks(), mimetype="application/json")
+
+
+def _media_list_item(row: tuple) -> dict:
+    # Row from `list_media_rows`; unpacked positionally to skip per-row objects.
+    media_id, project_id, original_name, content_type, size_bytes, created_at = row
+    return {
+        "id": media_id,
+        "project_id": project_id,
+        "original_name": original_name,
+        "content_type": content_type,
+        "size_bytes": size_bytes,
+        "created_at": created_at,
+        "url": f"/media/{media_id}",
+    }
+
+
+def _plan_list_item(p) -> dict:
+    return {
+        "id": p.id,
+        "created_at": p.created_at,
+        "model": p.model,
+        "is_template": p.is_template,
+    }
+
+
+# Background AI generations (`POST .../generate/jobs`). Job state lives in the
+# `generate_jobs` table, so any worker process can answer a status poll; the
+# most recent `_GENERATE_JOBS_MAX` stay pollable, and finished plans are stored
+# in `plans` like any other generation. A job still pending after
+# `_GENERATE_JOB_STALE_SECONDS` was lost with the process that ran it.
+_GENERATE_JOB_WORKERS = 4
+_GENERATE_JOBS_MAX = 256
+_GENERATE_JOB_STALE_SECONDS = 15 * 60
+_generate_executor: ThreadPoolExecutor | None = None
+_generate_executor_lock = threading.Lock()
+
+
+def _get_generate_executor() -> ThreadPoolExecutor:
+    global _generate_executor
+    with _generate_executor_lock:
+        if _generate_executor is None:
+            _generate_executor = ThreadPoolExecutor(
+                max_workers=_GENERATE_JOB_WORKERS, thread_name_prefix="generate-job"
+            )
+        return _generate_executor
+
+
+def _sse_event(event: str, data: str) -> str:
+    # Multi-line payloads need one `data:` field per line. Split on LF only:
+    # str.splitlines() also breaks on U+2028/U+0085, which orjson leaves raw.
+    lines = "".join(f"data: {line}\n" for line in data.rstrip("\n").split("\n"))
+    return f"event: {event}\n{lines}\n"
 
 
 @web.get("/")
@@ -192,20 +431,7 @@ def api_create_project() -> Response:
 
 @web.get("/api/projects")
 def api_list_projects() -> Response:
-    projects = list_projects(g._db)
-    return jsonify(
-        {
-            "items": [
-                {
-                    "id": p.id,
-                    "title": p.title,
-                    "intent_text": p.intent_text,
-                    "created_at": p.created_at,
-                }
-                for p in projects
-            ]
-        }
-    )
+    return _json_items_text_response(list_projects_json(g._db))
 
 
 @web.get("/api/projects/<int:project_id>")
@@ -229,23 +455,8 @@ def api_project_media(project_id: int) -> Response:
     if project is None:
         return jsonify({"error": "not found"}), 404
 
-    items = list_media(g._db, project_id=project_id)
-    return jsonify(
-        {
-            "items": [
-                {
-                    "id": m.id,
-                    "project_id": m.project_id,
-                    "original_name": m.original_name,
-                    "content_type": m.content_type,
-                    "size_bytes": m.size_bytes,
-                    "created_at": m.created_at,
-                    "url": f"/media/{m.id}",
-                }
-                for m in items
-            ]
-        }
-    )
+    items = list_media_rows(g._db, project_id=project_id)
+    return _json_items_response(items, _media_list_item)
 
 
 @web.post("/api/projects/<int:project_id>/upload")
@@ -267,12 +478,10 @@ def api_project_upload(project_id: int) -> Response:
 
     upload_dir = current_app.config["UPLOAD_DIR"]
     dst = os.path.join(upload_dir, stored_name)
-    f.save(dst)
-
-    size_bytes = os.path.getsize(dst)
+    size_bytes = _save_upload(f, dst)
     content_type = f.mimetype
 
-    media_id = insert_media(
+    media = insert_media(
         g._db,
         project_id=project_id,
         original_name=original_name,
@@ -283,13 +492,13 @@ def api_project_upload(project_id: int) -> Response:
 
     return jsonify(
         {
-            "id": media_id,
+            "id": media.id,
             "project_id": project_id,
             "original_name": original_name,
             "content_type": content_type,
             "size_bytes": size_bytes,
-            "created_at": list_media(g._db, project_id=project_id)[0].created_at,
-            "url": f"/media/{media_id}",
+            "created_at": media.created_at,
+            "url": f"/media/{media.id}",
         }
     )
 
@@ -321,8 +530,23 @@ def api_project_delete_media(project_id: int, media_id: int) -> Response:
     return jsonify({"ok": True})
 
 
+@web.post("/api/projects/<int:project_id>/generate/stream")
+def api_project_generate_stream(project_id: int) -> Response:
+    # Same request body as /generate. Errors found before generation starts and
+    # template drafts are answered with plain JSON; AI output is streamed as SSE.
+    return api_project_generate(project_id, stream=True)
+
+
+@web.post("/api/projects/<int:project_id>/generate/jobs")
+def api_project_generate_job(project_id: int) -> Response:
+    # Same request body as /generate. AI generation runs in the background: the
+    # response is 202 with a job id to poll at /api/jobs/<job_id>. Validation
+    # errors and template drafts are answered directly, as with /generate.
+    return api_project_generate(project_id, job=True)
+
+
 @web.post("/api/projects/<int:project_id>/generate")
-def api_project_generate(project_id: int) -> Response:
+def api_project_generate(project_id: int, stream: bool = False, job: bool = False) -> Response:
     project = _project_or_404(project_id)
     if project is None:
         return jsonify({"error": "not found"}), 404
@@ -361,7 +585,7 @@ def api_project_generate(project_id: int) -> Response:
     # Target platforms to generate. Backward compatible default is both.
     if generate_targets is None:
         targets = ["bluesky", "youtube"]
-    elif isinstance(generate_targets, list) and all(isinstance(x, str) for x in generate_targets):
+    elif is_str_list(generate_targets):
         targets = []
         for t in generate_targets:
             tl = t.strip().lower()
@@ -387,115 +611,16 @@ def api_project_generate(project_id: int) -> Response:
         return jsonify({"error": "selected_media_ids must be an array of integers"}), 400
 
     # Ensure selected media belong to this project.
-    media_items = {m.id: m for m in list_media(g._db, project_id=project_id)}
-    selected_items = []
-    for mid in selected_media_ids_int:
-        if mid not in media_items:
-            return jsonify({"error": f"media_id {mid} not found in this project"}), 400
-        selected_items.append(media_items[mid])
-
-    def _parse_builder_fields(text: str) -> tuple[str, str | None, str | None]:
-        focus = ""
-        audience = None
-        tone = None
-        for line in (x.strip() for x in text.splitlines()):
-            if line.lower().startswith("focus:"):
-                focus = line.split(":", 1)[1].strip()
-            elif line.lower().startswith("audience:"):
-                audience = line.split(":", 1)[1].strip() or None
-            elif line.lower().startswith("tone:"):
-                tone = line.split(":", 1)[1].strip() or None
-        if not focus:
-            focus = (project.title or "").strip() or "(untitled)"
-        return focus, audience, tone
+    media_items = get_media_by_ids(g._db, project_id=project_id, media_ids=selected_media_ids_int)
+    selected_items = list(map(media_items.get, selected_media_ids_int))
+    if None in selected_items:
+        missing = selected_media_ids_int[selected_items.index(None)]
+        return jsonify({"error": f"media_id {missing} not found in this project"}), 400
 
     effective_intent = intent_text or (project.intent_text or "")
     focus, audience, tone = _parse_builder_fields(effective_intent)
-
-    media_summary = [
-        {
-            "filename": m.original_name,
-            "content_type": m.content_type or "",
-            "size_bytes": m.size_bytes,
-        }
-        for m in selected_items
-    ]
-
-    def _simple_keywords(text: str) -> list[str]:
-        # Very light keyword extraction: split on non-alnum, keep unique tokens.
-        tokens: list[str] = []
-        cur = ""
-        for ch in text.lower():
-            if ch.isalnum():
-                cur += ch
-            else:
-                if cur:
-                    tokens.append(cur)
-                cur = ""
-        if cur:
-            tokens.append(cur)
-
-        stop = {
-            "the",
-            "a",
-            "an",
-            "and",
-            "or",
-            "to",
-            "for",
-            "of",
-            "in",
-            "on",
-            "with",
-            "my",
-            "your",
-            "our",
-            "this",
-            "that",
-            "is",
-            "are",
-            "it",
-            "as",
-        }
-
-        seen: set[str] = set()
-        out: list[str] = []
-        for t in tokens:
-            if len(t) < 3:
-                continue
-            if t in stop:
-                continue
-            if t in seen:
-                continue
-            seen.add(t)
-            out.append(t)
-        return out
-
-    def _normalize_hashtag_token(tag: str) -> str:
-        t = (tag or "").strip()
-        if t.startswith("#"):
-            t = t[1:]
-        return t.strip()
-
-    def _is_production_related_focus(text: str) -> bool:
-        tl = (text or "").lower()
-        keywords = [
-            "video production",
-            "music production",
-            "producer",
-            "production",
-            "editing",
-            "video editing",
-            "filming",
-            "cinematography",
-            "recording",
-            "mixing",
-            "mastering",
-            "sound design",
-            "beat",
-            "studio",
-        ]
-        return any(k in tl for k in keywords)
+    if not focus:
+        focus = (project.title or "").strip() or "(untitled)"
 
     def _suggest_specific_hashtags_for_focus(text: str) -> list[str]:
         tl = (text or "").lower()
@@ -516,47 +641,41 @@ def api_project_generate(project_id: int) -> Response:
         return out
 
     def _pick_bluesky_hashtags(*, focus: str, audience: str | None, tone: str | None) -> list[str]:
-        banned = {"creators", "content", "producers"}
-
         # Prefer focus-specific tags first.
         focus_specific = _suggest_specific_hashtags_for_focus(focus)
 
         # Then use keywords, but bias toward the focus line (avoid super generic filler).
         kw_focus = _simple_keywords(focus)
-        kw_other = _simple_keywords(" ".join([audience or "", tone or ""]))
-
-        allow_generic = {"makers", "artists"}
-        discouraged = {"update", "project", "demo", "behindthescenes", "build", "new"}
-
-        candidates: list[str] = []
-        candidates.extend(focus_specific)
-        candidates.extend([k for k in kw_focus if k not in discouraged])
-        candidates.extend([k for k in kw_other if k not in discouraged])
-        candidates.extend([k for k in kw_focus if k in allow_generic])
 
-        out: list[str] = []
-        for c in candidates:
+        def _candidates():
+            # Lazy: audience/tone are only tokenized if the focus didn't fill all 5 slots.
+            yield from focus_specific
+            yield from (k for k in kw_focus if k not in _DISCOURAGED_HASHTAGS)
+            kw_other = _simple_keywords(" ".join([audience or "", tone or ""]))
+            yield from (k for k in kw_other if k not in _DISCOURAGED_HASHTAGS)
+            yield from (k for k in kw_focus if k in _ALLOWED_GENERIC_HASHTAGS)
+
+        # Insertion-ordered dict as an ordered set.
+        out: dict[str, None] = {}
+        for c in _candidates():
             t = _normalize_hashtag_token(c)
             if not t:
                 continue
-            if t in banned:
+            if t in _BANNED_GENERIC_HASHTAGS:
                 continue
             if "#" in t:
                 continue
-            if t not in out:
-                out.append(t)
+            out.setdefault(t)
             if len(out) >= 5:
                 break
 
         # Ensure at least 2 tags when possible.
-        allowlist_fallback = ["bluesky", "flask", "opensource", "atproto", "helpmepost"]
-        for t in allowlist_fallback:
+        for t in _FALLBACK_HASHTAGS:
             if len(out) >= 2:
                 break
-            if t not in out:
-                out.append(t)
+            out.setdefault(t)
 
-        return out[:5]
+        return list(out)[:5]
 
     def _bluesky_hook_line(*, focus: str, tone: str | None) -> str:
         base = (focus or "").strip() or "Update"
@@ -573,11 +692,9 @@ def api_project_generate(project_id: int) -> Response:
             return f"I built {base}.".strip()
         return f"I built {base}.".strip()
 
-    _HASHTAG_RE = re.compile(r"(?<!\\w)#([A-Za-z0-9_]+)")
-
     def _render_bluesky_text_from_hashtags(text: str, hashtags: list[str]) -> str:
-        # Single source of truth: the hashtags array.
-        tags: list[str] = []
+        # Single source of truth: the hashtags array (insertion-ordered dict as an ordered set).
+        tags: dict[str, None] = {}
         for h in (hashtags or []):
             if not isinstance(h, str):
                 continue
@@ -585,43 +702,35 @@ def api_project_generate(project_id: int) -> Response:
             if not t:
                 continue
             if "#" in t:
-                t = t.replace("#", "")
-            if t and t not in tags:
-                tags.append(t)
+                t = t.replace("#", "").strip()
+            if t:
+                tags.setdefault(t)
             if len(tags) >= 5:
                 break
 
         raw = (text or "").strip()
         # Remove any existing hashtags anywhere in the text to prevent drift/banned tag reappearance.
-        body = _HASHTAG_RE.sub("", raw)
+        body = _INLINE_HASHTAG_RE.sub("", raw)
         # Clean up whitespace artifacts from removals.
-        body = re.sub(r"[ \t]{2,}", " ", body)
-        body = re.sub(r"\n{3,}", "\n\n", body)
-        body = body.strip()
-
-        hashtags_line = " ".join([f"#{t}" for t in tags])
-        if hashtags_line:
-            composed = (body + "\n\n" + hashtags_line).strip() if body else hashtags_line
-        else:
-            composed = body
-
-        # Enforce Bluesky 300-char cap while preserving the hashtag line.
-        if len(composed) > 300:
-            if hashtags_line:
-                suffix = "\n\n" + hashtags_line
-                max_body = 300 - len(suffix)
-                if max_body <= 1:
-                    body_trim = "…"
-                else:
-                    body_trim = (body[: max_body - 1].rstrip() + "…") if body else ""
-                if body_trim:
-                    composed = (body_trim + suffix).strip()
-                else:
-                    composed = suffix.strip()
-            else:
-                composed = composed[:297].rstrip() + "…"
-
-        return composed
+        body = _BLANK_RUN_RE.sub(_collapse_blank_run, body).strip()
+
+        hashtags_line = " ".join(["#" + t for t in tags])
+        if not hashtags_line:
+            return body if len(body) <= 300 else body[:297].rstrip() + "…"
+
+        # Enforce Bluesky 300-char cap while preserving the hashtag line. Every part
+        # is already stripped, so the final length is known before building the text.
+        suffix = "\n\n" + hashtags_line
+        if body and len(body) + len(suffix) <= 300:
+            return body + suffix
+        if not body and len(hashtags_line) <= 300:
+            return hashtags_line
+        max_body = 300 - len(suffix)
+        if max_body <= 1:
+            return "…" + suffix
+        if not body:
+            return hashtags_line
+        return body[: max_body - 1].rstrip() + "…" + suffix
 
     def _cta_line_for_target(target: str | None) -> str:
         t = (target or "").strip()
@@ -679,7 +788,7 @@ def api_project_generate(project_id: int) -> Response:
             # Alt text: one per selected media, by filename/type.
             alt_text: list[str] = []
             for m in selected_items:
-                ct = (m.content_type or "").lower()
+                ct = m.content_type or ""
                 if ct.startswith("image/"):
                     alt_text.append(f"Image: {m.original_name}")
                 elif ct.startswith("video/"):
@@ -735,26 +844,25 @@ def api_project_generate(project_id: int) -> Response:
         return out
 
     if template_mode:
-        plan = _template_plan()
-        validation = validate_plan(plan, targets=targets)
-        if not validation.ok:
-            current_app.logger.error("Template plan failed validation: %s", "; ".join(validation.errors))
-            return (
-                jsonify(
-                    {
-                        "ok": False,
-                        "error": {
-                            "error_type": "schema_invalid",
-                            "human_message": "Template draft generation failed due to an internal schema error.",
-                        },
-                    }
-                ),
-                500,
-            )
-        # Contextual alt_text validation (same rule as AI path).
-        if want_bluesky:
-            alt_text = plan.get("bluesky", {}).get("alt_text", [])
-            if not isinstance(alt_text, list) or len(alt_text) != len(selected_items):
+        # Everything `_template_plan` reads (media only by name and type).
+        cache_key = (
+            focus,
+            audience,
+            tone,
+            add_emojis,
+            include_cta,
+            cta_target,
+            tuple(targets),
+            tuple((m.original_name, m.content_type) for m in selected_items),
+        )
+        plan_json = _template_plan_cache_get(cache_key)
+        if plan_json is not None:
+            plan = fastjson.loads(plan_json)
+        else:
+            plan = _template_plan()
+            validation = validate_plan(plan, targets=targets)
+            if not validation.ok:
+                current_app.logger.error("Template plan failed validation: %s", "; ".join(validation.errors))
                 return (
                     jsonify(
                         {
@@ -767,8 +875,27 @@ def api_project_generate(project_id: int) -> Response:
                     ),
                     500,
                 )
+            # Contextual alt_text validation (same rule as AI path).
+            if want_bluesky:
+                alt_text = plan.get("bluesky", {}).get("alt_text", [])
+                if not isinstance(alt_text, list) or len(alt_text) != len(selected_items):
+                    return (
+                        jsonify(
+                            {
+                                "ok": False,
+                                "error": {
+                                    "error_type": "schema_invalid",
+                                    "human_message": "Template draft generation failed due to an internal schema error.",
+                                },
+                            }
+                        ),
+                        500,
+                    )
+
+            plan_json = fastjson.dumps(plan)
+            _template_plan_cache_put(cache_key, plan_json)
 
-        plan_id = insert_plan(g._db, project_id=project_id, model="template", plan_json=json.dumps(plan))
+        plan_id = insert_plan(g._db, project_id=project_id, model="template", plan_json=plan_json)
 
         resp: dict = {
             "ok": True,
@@ -791,284 +918,332 @@ def api_project_generate(project_id: int) -> Response:
             }
         return jsonify(resp)
 
+    # Only the AI prompt uses this; built after the template early return.
+    media_summary = [
+        {
+            "filename": m.original_name,
+            "content_type": m.content_type or "",
+            "size_bytes": m.size_bytes,
+        }
+        for m in selected_items
+    ]
+
     ai = AIClient(model=model)
+    generate_kwargs = {
+        "focus": focus,
+        "audience": audience,
+        "tone": tone,
+        "media_summary": media_summary,
+        "add_emojis": add_emojis,
+        "include_cta": include_cta,
+        "cta_target": cta_target,
+        "generate_targets": targets,
+    }
 
-    result = ai.generate_plan(
-        focus=focus,
-        audience=audience,
-        tone=tone,
-        media_summary=media_summary,
-        add_emojis=add_emojis,
-        include_cta=include_cta,
-        cta_target=cta_target,
-        generate_targets=targets,
-    )
+    def _finish_ai_plan(result: PlanGenerationResult):
+        if not result.ok or result.plan is None:
+            err = result.error
+            details = err.details if err else None
+            if details:
+                current_app.logger.error("AI generation failed (%s): %s", err.error_type if err else "unknown", details)
+            return (
+                jsonify(
+                    {
+                        "ok": False,
+                        "error": {
+                            "error_type": err.error_type if err else "unknown",
+                            "human_message": err.human_message if err else "AI generation failed.",
+                        },
+                    }
+                ),
+                502,
+            )
 
-    if not result.ok or result.plan is None:
-        err = result.error
-        details = err.details if err else None
-        if details:
-            current_app.logger.error("AI generation failed (%s): %s", err.error_type if err else "unknown", details)
-        return (
-            jsonify(
-                {
-                    "ok": False,
-                    "error": {
-                        "error_type": err.error_type if err else "unknown",
-                        "human_message": err.human_message if err else "AI generation failed.",
-                    },
-                }
-            ),
-            502,
-        )
+        # Store meta about what was generated.
+        if isinstance(result.plan, dict):
+            meta = result.plan.get("meta")
+            if not isinstance(meta, dict):
+                meta = {}
+                result.plan["meta"] = meta
+            meta["targets"] = targets
 
-    # Store meta about what was generated.
-    if isinstance(result.plan, dict):
-        meta = result.plan.get("meta")
-        if not isinstance(meta, dict):
-            meta = {}
-            result.plan["meta"] = meta
-        meta["targets"] = targets
+        # Validate again at the route boundary (defense in depth).
+        validation = validate_plan(result.plan, targets=targets)
+        if not validation.ok:
+            current_app.logger.error("AI plan schema invalid after generation: %s", "; ".join(validation.errors))
+            return (
+                jsonify(
+                    {
+                        "ok": False,
+                        "error": {
+                            "error_type": "schema_invalid",
+                            "human_message": "AI generation returned an invalid plan format.",
+                        },
+                    }
+                ),
+                502,
+            )
 
-    # Validate again at the route boundary (defense in depth).
-    validation = validate_plan(result.plan, targets=targets)
-    if not validation.ok:
-        current_app.logger.error("AI plan schema invalid after generation: %s", "; ".join(validation.errors))
-        return (
-            jsonify(
-                {
-                    "ok": False,
-                    "error": {
-                        "error_type": "schema_invalid",
-                        "human_message": "AI generation returned an invalid plan format.",
-                    },
-                }
-            ),
-            502,
-        )
+        # `validate_plan` only passes dicts; everything below works on this one.
+        plan: dict = result.plan
 
-    # Contextual validation: alt_text must align 1:1 with selected media.
-    try:
-        if want_bluesky:
-            alt_text = result.plan.get("bluesky", {}).get("alt_text", [])
-            if not isinstance(alt_text, list) or len(alt_text) != len(selected_items):
-                current_app.logger.error(
-                    "AI plan schema invalid: bluesky.alt_text length %s does not match selected media count %s",
-                    len(alt_text) if isinstance(alt_text, list) else "(not a list)",
-                    len(selected_items),
-                )
-                return (
-                    jsonify(
-                        {
-                            "ok": False,
-                            "error": {
-                                "error_type": "schema_invalid",
-                                "human_message": "AI generation returned an invalid plan format.",
-                            },
-                        }
-                    ),
-                    502,
-                )
-    except Exception:
-        return (
-            jsonify(
-                {
-                    "ok": False,
-                    "error": {
-                        "error_type": "schema_invalid",
-                        "human_message": "AI generation returned an invalid plan format.",
-                    },
-                }
-            ),
-            502,
-        )
+        # Contextual validation: alt_text must align 1:1 with selected media.
+        try:
+            if want_bluesky:
+                alt_text = plan.get("bluesky", {}).get("alt_text", [])
+                if not isinstance(alt_text, list) or len(alt_text) != len(selected_items):
+                    current_app.logger.error(
+                        "AI plan schema invalid: bluesky.alt_text length %s does not match selected media count %s",
+                        len(alt_text) if isinstance(alt_text, list) else "(not a list)",
+                        len(selected_items),
+                    )
+                    return (
+                        jsonify(
+                            {
+                                "ok": False,
+                                "error": {
+                                    "error_type": "schema_invalid",
+                                    "human_message": "AI generation returned an invalid plan format.",
+                                },
+                            }
+                        ),
+                        502,
+                    )
+        except Exception:
+            return (
+                jsonify(
+                    {
+                        "ok": False,
+                        "error": {
+                            "error_type": "schema_invalid",
+                            "human_message": "AI generation returned an invalid plan format.",
+                        },
+                    }
+                ),
+                502,
+            )
 
-    def _inject_cta_into_bluesky_text(text: str, target: str) -> str:
-        cta_line = _cta_line_for_target(target).strip()
+        def _inject_cta_into_bluesky_text(text: str, target: str) -> str:
+            cta_line = _cta_line_for_target(target).strip()
 
-        raw = (text or "").strip()
-        if not raw:
-            raw = ""
-
-        lines = raw.splitlines() if raw else []
-        hashtags_line = ""
-        body_lines = lines
-
-        # Heuristic: if the last non-empty line contains hashtags, keep it as the final line.
-        for i in range(len(lines) - 1, -1, -1):
-            if lines[i].strip():
-                if "#" in lines[i]:
-                    hashtags_line = lines[i].strip()
-                    body_lines = lines[:i]
-                break
+            lines = (text or "").strip().splitlines()
+            hashtags_line = ""
 
-        body = "\n".join(body_lines).strip()
-        if body:
-            composed = body + "\n" + cta_line
-        else:
-            composed = cta_line
+            # Heuristic: if the last line contains hashtags, keep it as the final line.
+            # The text is stripped, so the last line is never blank.
+            if lines and "#" in lines[-1]:
+                hashtags_line = lines.pop().strip()
 
-        if hashtags_line:
-            composed = (composed + "\n\n" + hashtags_line).strip()
+            body = "\n".join(lines).strip()
 
-        # Enforce Bluesky text length cap while preserving CTA + hashtags line.
-        if len(composed) > 300:
+            # Enforce Bluesky text length cap while preserving CTA + hashtags line.
+            # Every part is already stripped, so the final length is known up front.
             suffix = "\n" + cta_line
             if hashtags_line:
-                suffix = "\n" + cta_line + "\n\n" + hashtags_line
-
-            # Trim the body to fit.
+                suffix += "\n\n" + hashtags_line
+            if body:
+                if len(body) + len(suffix) <= 300:
+                    return body + suffix
+            elif len(suffix) <= 301:
+                return suffix[1:]
+
+            # Trim the body to fit (with no body, only reached when CTA + hashtags alone overflow).
             max_body = 300 - len(suffix)
             if max_body <= 1:
-                body_trim = "…"
-            else:
-                body_trim = body[: max_body - 1].rstrip() + "…" if body else ""
+                return "…" + suffix
+            return body[: max_body - 1].rstrip() + "…" + suffix
 
-            if body_trim:
-                composed = (body_trim + suffix).strip()
-            else:
-                # Worst case: no room for body; keep CTA + hashtags.
-                composed = suffix.strip()
-                if len(composed) > 300:
-                    composed = composed[:297].rstrip() + "…"
-
-        return composed
-
-    def _postprocess_bluesky_hashtags(plan: dict, *, focus: str) -> None:
-        b = plan.get("bluesky")
-        if not isinstance(b, dict):
-            return
-        raw = b.get("hashtags")
-        if not isinstance(raw, list) or not all(isinstance(x, str) for x in raw):
-            return
-
-        banned = {"creators", "content", "producers"}
-        allowlist_lower = ["bluesky", "flask", "opensource", "atproto", "helpmepost"]
-        allowlist_camel = {
-            "bluesky": "Bluesky",
-            "flask": "Flask",
-            "opensource": "OpenSource",
-            "atproto": "ATProto",
-            "helpmepost": "HelpMePost",
-        }
-
-        keep_style_camel = any(any(ch.isupper() for ch in t) for t in raw)
-        allowlist = [allowlist_camel[t] for t in allowlist_lower] if keep_style_camel else allowlist_lower
-
-        focus_is_prod = _is_production_related_focus(focus)
-
-        cleaned: list[str] = []
-        removed_any = False
-        for t in raw:
-            tt = _normalize_hashtag_token(t)
-            if not tt:
-                continue
-            # Treat case-insensitively for banned checks.
-            tl = tt.lower()
-            if (tl in banned) and not focus_is_prod:
-                removed_any = True
-                continue
-            if "#" in tt:
-                # Never allow '#'.
-                removed_any = True
-                tt = tt.replace("#", "")
+        def _postprocess_bluesky_hashtags(plan: dict, *, focus: str) -> None:
+            b = plan.get("bluesky")
+            if not isinstance(b, dict):
+                return
+            raw = b.get("hashtags")
+            if not is_str_list(raw):
+                return
+
+            keep_style_camel = any(any(ch.isupper() for ch in t) for t in raw)
+            allowlist = _FALLBACK_HASHTAGS_CAMEL if keep_style_camel else _FALLBACK_HASHTAGS
+
+            focus_is_prod = _is_production_related_focus(focus)
+
+            # Insertion-ordered dict as an ordered set.
+            cleaned: dict[str, None] = {}
+            removed_any = False
+            for t in raw:
+                tt = _normalize_hashtag_token(t)
                 if not tt:
                     continue
-            if tt not in cleaned:
-                cleaned.append(tt)
-            if len(cleaned) >= 5:
-                break
+                # Treat case-insensitively for banned checks.
+                tl = tt.lower()
+                if (tl in _BANNED_GENERIC_HASHTAGS) and not focus_is_prod:
+                    removed_any = True
+                    continue
+                if "#" in tt:
+                    # Never allow '#'.
+                    removed_any = True
+                    tt = tt.replace("#", "")
+                    if not tt:
+                        continue
+                cleaned.setdefault(tt)
+                if len(cleaned) >= 5:
+                    break
 
-        # If we removed banned generic tags, replace with stable specific allowlist tags.
-        if removed_any and not focus_is_prod:
+            # If we removed banned generic tags, replace with stable specific allowlist tags.
+            if removed_any and not focus_is_prod:
+                for t in allowlist:
+                    if len(cleaned) >= 5:
+                        break
+                    cleaned.setdefault(t)
+
+            # Ensure minimum of 2 hashtags if possible.
             for t in allowlist:
-                if len(cleaned) >= 5:
+                if len(cleaned) >= 2:
                     break
-                if t not in cleaned:
-                    cleaned.append(t)
+                cleaned.setdefault(t)
 
-        # Ensure minimum of 2 hashtags if possible.
-        for t in allowlist:
-            if len(cleaned) >= 2:
-                break
-            if t not in cleaned:
-                cleaned.append(t)
+            b["hashtags"] = list(cleaned)[:5]
 
-        b["hashtags"] = cleaned[:5]
+        def _ensure_cta_verbatim(plan: dict, target: str, *, want_bluesky: bool, want_youtube: bool) -> None:
+            target = (target or "").strip()
+            if not target:
+                return
 
-    def _ensure_cta_verbatim(plan: dict, target: str, *, want_bluesky: bool, want_youtube: bool) -> None:
-        target = (target or "").strip()
-        if not target:
-            return
+            if want_bluesky:
+                b = plan.get("bluesky")
+                if isinstance(b, dict):
+                    b_text = str(b.get("text") or "")
+                    if target not in b_text:
+                        b["text"] = _inject_cta_into_bluesky_text(b_text, target)
+
+            if want_youtube:
+                y = plan.get("youtube")
+                if isinstance(y, dict):
+                    y_desc = str(y.get("description") or "")
+                    if target not in y_desc:
+                        y["description"] = (y_desc.rstrip() + "\n\n" + _cta_line_for_target(target)).strip()
+
+        # Safety net: even if the AI ignores the instruction, guarantee the link/handle is present.
+        if include_cta and cta_target:
+            _ensure_cta_verbatim(plan, cta_target, want_bluesky=want_bluesky, want_youtube=want_youtube)
 
         if want_bluesky:
+            # Optional minimal hardening: drop banned generic Bluesky hashtags if focus isn't production-related.
+            _postprocess_bluesky_hashtags(plan, focus=focus)
+
+            # Hashtag single source of truth (Bluesky): ensure inline hashtags in text are rendered
+            # directly from bluesky.hashtags (no drift, consistent casing, max 5).
             b = plan.get("bluesky")
             if isinstance(b, dict):
-                b_text = str(b.get("text") or "")
-                if target not in b_text:
-                    b["text"] = _inject_cta_into_bluesky_text(b_text, target)
-
-        if want_youtube:
-            y = plan.get("youtube")
-            if isinstance(y, dict):
-                y_desc = str(y.get("description") or "")
-                if target not in y_desc:
-                    y["description"] = (y_desc.rstrip() + "\n\n" + _cta_line_for_target(target)).strip()
-
-    # Safety net: even if the AI ignores the instruction, guarantee the link/handle is present.
-    if include_cta and cta_target and isinstance(result.plan, dict):
-        _ensure_cta_verbatim(result.plan, cta_target, want_bluesky=want_bluesky, want_youtube=want_youtube)
-
-    # Optional minimal hardening: drop banned generic Bluesky hashtags if focus isn't production-related.
-    if want_bluesky and isinstance(result.plan, dict):
-        _postprocess_bluesky_hashtags(result.plan, focus=focus)
-
-    # Hashtag single source of truth (Bluesky): ensure inline hashtags in text are rendered
-    # directly from bluesky.hashtags (no drift, consistent casing, max 5).
-    if want_bluesky and isinstance(result.plan, dict):
-        b = result.plan.get("bluesky")
-        if isinstance(b, dict):
-            text = str(b.get("text") or "")
-            tags = b.get("hashtags")
-            if isinstance(tags, list) and all(isinstance(x, str) for x in tags):
-                b["text"] = _render_bluesky_text_from_hashtags(text, tags)
-
-    # Enforce target-scoped storage: do not persist unrequested sections.
-    if isinstance(result.plan, dict):
-        if not want_bluesky:
-            result.plan.pop("bluesky", None)
+                text = str(b.get("text") or "")
+                tags = b.get("hashtags")
+                if is_str_list(tags):
+                    b["text"] = _render_bluesky_text_from_hashtags(text, tags)
+        else:
+            # Enforce target-scoped storage: do not persist unrequested sections.
+            plan.pop("bluesky", None)
         if not want_youtube:
-            result.plan.pop("youtube", None)
+            plan.pop("youtube", None)
 
-    # Keep stored plan_json as the canonical schema only (single source of truth).
-    plan_id = insert_plan(g._db, project_id=project_id, model=ai.model, plan_json=json.dumps(result.plan))
-
-    resp: dict = {
-        "ok": True,
-        "id": plan_id,
-        "project_id": project_id,
-        "selected_media_ids": selected_media_ids_int,
-        "meta": {"targets": targets},
-        "warnings": result.warnings,
-    }
+        # Keep stored plan_json as the canonical schema only (single source of truth).
+        plan_id = insert_plan(g._db, project_id=project_id, model=ai.model, plan_json=fastjson.dumps(plan))
 
-    if want_bluesky and isinstance(result.plan, dict) and "bluesky" in result.plan:
-        bluesky = bluesky_from_canonical(result.plan)
-        resp["bluesky"] = {
-            "text": bluesky.text,
-            "hashtags": bluesky.hashtags,
-            "alt_text": bluesky.alt_text,
-        }
-    if want_youtube and isinstance(result.plan, dict) and "youtube" in result.plan:
-        youtube = youtube_from_canonical(result.plan)
-        resp["youtube"] = {
-            "title": youtube.title,
-            "description": youtube.description,
-            "tags": youtube.tags,
-            "category": youtube.category,
+        resp: dict = {
+            "ok": True,
+            "id": plan_id,
+            "project_id": project_id,
+            "selected_media_ids": selected_media_ids_int,
+            "meta": {"targets": targets},
+            "warnings": result.warnings,
         }
 
-    return jsonify(resp)
+        if want_bluesky and "bluesky" in plan:
+            bluesky = bluesky_from_canonical(plan)
+            resp["bluesky"] = {
+                "text": bluesky.text,
+                "hashtags": bluesky.hashtags,
+                "alt_text": bluesky.alt_text,
+            }
+        if want_youtube and "youtube" in plan:
+            youtube = youtube_from_canonical(plan)
+            resp["youtube"] = {
+                "title": youtube.title,
+                "description": youtube.description,
+                "tags": youtube.tags,
+                "category": youtube.category,
+            }
+
+        return jsonify(resp)
+
+    if job:
+
+        job_id = uuid.uuid4().hex
+        with transaction(g._db):
+            insert_generate_job(g._db, project_id=project_id, job_id=job_id, commit=False)
+            prune_generate_jobs(g._db, keep=_GENERATE_JOBS_MAX, commit=False)
+
+        @copy_current_request_context
+        def _run_job() -> None:
+            # The copied context has a fresh `g`; give the job its own connection.
+            g._db = conn = get_db(current_app)
+            try:
+                try:
+                    rv = _finish_ai_plan(ai.generate_plan(**generate_kwargs))
+                except Exception:
+                    current_app.logger.exception("Generate job %s failed", job_id)
+                    finish_generate_job(conn, job_id=job_id, status="failed")
+                    return
+                final = rv[0] if isinstance(rv, tuple) else rv
+                status = rv[1] if isinstance(rv, tuple) else final.status_code
+                finish_generate_job(
+                    conn, job_id=job_id, status="done", http_status=status, body=final.get_data(as_text=True)
+                )
+            finally:
+                g._db = None
+                conn.close()
+
+        _get_generate_executor().submit(_run_job)
+        status_url = f"/api/jobs/{job_id}"
+        return jsonify({"ok": True, "job_id": job_id, "status_url": status_url}), 202, {"Location": status_url}
+
+    if not stream:
+        return _finish_ai_plan(ai.generate_plan(**generate_kwargs))
+
+    # SSE: forward model output as it arrives (`delta` events), then send the
+    # same body the JSON endpoint would return as a final `result` event.
+    plan_stream = ai.stream_plan(**generate_kwargs)
+
+    def _events():
+        for delta in plan_stream:
+            yield _sse_event("delta", json.dumps({"content": delta}))
+        rv = _finish_ai_plan(plan_stream.result)
+        final = rv[0] if isinstance(rv, tuple) else rv
+        yield _sse_event("result", final.get_data(as_text=True))
+
+    return Response(
+        stream_with_context(_events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@web.get("/api/jobs/<job_id>")
+def api_job_status(job_id: str) -> Response:
+    job = get_generate_job(g._db, job_id=job_id)
+    if job is None:
+        return jsonify({"error": "not found"}), 404
+    if job.status == "pending":
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(job.created_at)
+        if age.total_seconds() < _GENERATE_JOB_STALE_SECONDS:
+            return jsonify({"ok": True, "job_id": job_id, "status": "pending"}), 202
+        error = {"error_type": "job_lost", "human_message": "AI generation did not finish; please try again."}
+        return jsonify({"ok": False, "error": error}), 500
+    if job.status != "done":
+        return (
+            jsonify({"ok": False, "error": {"error_type": "job_failed", "human_message": "AI generation failed."}}),
+            500,
+        )
+    # The body the /generate endpoint would have returned.
+    return current_app.response_class(job.body, status=job.http_status, mimetype="application/json")
 
 
 @web.get("/api/projects/<int:project_id>/plans")
@@ -1077,24 +1252,8 @@ def api_project_plans(project_id: int) -> Response:
     if project is None:
         return jsonify({"error": "not found"}), 404
 
-    plans = list_plans_for_project(g._db, project_id=project_id)
-    return jsonify(
-        {
-            "items": [
-                {
-                    "id": p.id,
-                    "created_at": p.created_at,
-                    "model": p.model,
-                    "is_template": bool(
-                        (json.loads(p.plan_json).get("meta") or {}).get("is_template")
-                    )
-                    if p.plan_json
-                    else False,
-                }
-                for p in plans
-            ]
-        }
-    )
+    plans = list_plan_summaries_for_project(g._db, project_id=project_id)
+    return _json_items_response(plans, _plan_list_item)
 
 
 @web.post("/api/projects/<int:project_id>/bluesky_post")
@@ -1134,17 +1293,16 @@ def api_project_bluesky_post(project_id: int) -> Response:
         return jsonify({"error": "Select at least one image."}), 400
 
     # Validate + load media items; ensure they belong to this project.
-    media_items = {m.id: m for m in list_media(g._db, project_id=project_id)}
-    selected_items = []
-    for mid in selected_ids:
-        if mid not in media_items:
-            return jsonify({"error": f"media_id {mid} not found in this project"}), 400
-        selected_items.append(media_items[mid])
+    media_items = get_media_by_ids(g._db, project_id=project_id, media_ids=selected_ids)
+    selected_items = list(map(media_items.get, selected_ids))
+    if None in selected_items:
+        missing = selected_ids[selected_items.index(None)]
+        return jsonify({"error": f"media_id {missing} not found in this project"}), 400
 
     # Images only: 1-4 images, no GIF.
     images = []
     for m in selected_items:
-        ct = (m.content_type or "").lower()
+        ct = m.content_type or ""
         if not ct.startswith("image/"):
             return jsonify({"error": "Only images are supported for Bluesky posting (no video yet)."}), 400
         if ct == "image/gif":
@@ -1157,67 +1315,82 @@ def api_project_bluesky_post(project_id: int) -> Response:
         return jsonify({"error": "Bluesky supports up to 4 images per post."}), 400
 
     if alt_text is not None:
-        if not isinstance(alt_text, list) or not all(isinstance(x, str) for x in alt_text):
+        if not is_str_list(alt_text):
             return jsonify({"error": "alt_text must be an array of strings"}), 400
         if len(alt_text) != len(images):
             return jsonify({"error": "alt_text length must match selected image count"}), 400
 
+    upload_dir = current_app.config["UPLOAD_DIR"]
+
+    # Bluesky's images embed enforces 1,000,000 bytes per image.
+    # Oversized files are compressed deterministically to JPEG; start all of them
+    # now so they run in parallel (and overlap with the login round-trip).
+    pending_optimizations = {
+        idx: optimize_for_bluesky_async(
+            os.path.join(upload_dir, m.stored_name),
+            m.content_type or "application/octet-stream",
+            cache_dir=os.path.join(upload_dir, OPTIMIZE_CACHE_DIRNAME),
+            workers=current_app.config["IMAGE_OPTIMIZE_WORKERS"],
+        )
+        for idx, m in enumerate(images)
+        if int(m.size_bytes or 0) > BSKY_MAX_IMAGE_BYTES
+    }
+
     # Authenticate and post (do not persist tokens).
     try:
         access_jwt, did = create_session(identifier=identifier, app_password=app_password)
 
-        uploaded_images = []
-        optimization_details: list[dict[str, int | str | bool]] = []
-        compressed_count = 0
-        upload_dir = current_app.config["UPLOAD_DIR"]
-
-        for idx, m in enumerate(images):
+        def _upload(idx: int, m) -> tuple[dict, dict[str, int | str | bool] | None]:
+            # Runs on a worker thread: no Flask globals in here.
             path = os.path.join(upload_dir, m.stored_name)
-            original_size = int(m.size_bytes or 0)
-            content_type = (m.content_type or "application/octet-stream").lower()
+            content_type = m.content_type or "application/octet-stream"
 
-            # Bluesky's images embed enforces 1,000,000 bytes per image.
-            # If the file is oversized, compress deterministically to JPEG.
-            if original_size > BSKY_MAX_IMAGE_BYTES:
-                try:
-                    optimized = optimize_for_bluesky(path, content_type)
-                except ImageOptimizationError:
-                    return (
-                        jsonify(
-                            {
-                                "ok": False,
-                                "error": {
-                                    "human_message": "Image could not be compressed under Bluesky’s 1MB limit.",
-                                },
-                            }
-                        ),
-                        400,
-                    )
+            if idx not in pending_optimizations:
+                with open(path, "rb") as f:
+                    return upload_blob(access_jwt=access_jwt, content_type=content_type, data=f), None
+
+            optimized = pending_optimizations[idx].result(timeout=OPTIMIZE_TIMEOUT_SECONDS)
+            blob = upload_blob(access_jwt=access_jwt, content_type=str(optimized["out_mime"]), data=optimized["bytes"])
+            # The optimizer already returns plain int/bool/str values.
+            return blob, {
+                "index": idx,
+                "original_size_bytes": m.size_bytes,
+                "optimized_size_bytes": optimized["size_bytes"],
+                "width": optimized["width"],
+                "height": optimized["height"],
+                "quality": optimized["quality"],
+                "changed": optimized["changed"],
+                "out_mime": optimized["out_mime"],
+            }
 
-                blob = upload_blob(access_jwt=access_jwt, content_type=str(optimized["out_mime"]), data=optimized["bytes"])
-                compressed_count += 1
-                optimization_details.append(
+        # Blob uploads are independent round-trips; run them side by side on the
+        # shared keep-alive pool instead of one after another.
+        try:
+            with ThreadPoolExecutor(max_workers=len(images), thread_name_prefix="bsky-upload") as pool:
+                uploads = list(pool.map(_upload, range(len(images)), images))
+        except (ImageOptimizationError, FuturesTimeoutError):
+            return (
+                jsonify(
                     {
-                        "index": int(idx),
-                        "original_size_bytes": int(original_size),
-                        "optimized_size_bytes": int(optimized["size_bytes"]),
-                        "width": int(optimized["width"]),
-                        "height": int(optimized["height"]),
-                        "quality": int(optimized["quality"]),
-                        "changed": bool(optimized["changed"]),
-                        "out_mime": str(optimized["out_mime"]),
+                        "ok": False,
+                        "error": {
+                            "human_message": "Image could not be compressed under Bluesky’s 1MB limit.",
+                        },
                     }
-                )
-            else:
-                with open(path, "rb") as f:
-                    raw = f.read()
-                blob = upload_blob(access_jwt=access_jwt, content_type=content_type, data=raw)
+                ),
+                400,
+            )
 
+        uploaded_images = []
+        optimization_details: list[dict[str, int | str | bool]] = []
+        for idx, (blob, detail) in enumerate(uploads):
             alt = ""
             if isinstance(alt_text, list):
                 alt = alt_text[idx]
-
             uploaded_images.append({"alt": alt, "image": blob})
+            if detail is not None:
+                optimization_details.append(detail)
+        compressed_count = len(optimization_details)
 
         facets = build_link_facets(text)
         result = create_post_with_images(access_jwt=access_jwt, did=did, text=text, images=uploaded_images, facets=facets)
@@ -1239,46 +1412,42 @@ def api_project_bluesky_post(project_id: int) -> Response:
     except Exception:
         current_app.logger.exception("Bluesky post failed due to an internal error")
         return jsonify({"ok": False, "error": {"human_message": "Bluesky post failed due to an internal error."}}), 502
+    finally:
+        # Drop queued work for images we no longer need (e.g. after a failure).
+        for fut in pending_optimizations.values():
+            fut.cancel()
 
 
 @web.get("/api/projects/<int:project_id>/plans/<int:plan_id>")
 def api_project_plan_detail(project_id: int, plan_id: int) -> Response:
-    project = _project_or_404(project_id)
-    if project is None:
-        return jsonify({"error": "not found"}), 404
-
-    plan = get_plan_for_project(g._db, project_id=project_id, plan_id=plan_id)
-    if plan is None:
-        return jsonify({"error": "not found"}), 404
+    cache_key = (current_app.config["DATABASE_PATH"], project_id, plan_id)
+    body = _plan_detail_cache_get(cache_key)
+    if body is None:
+        project = _project_or_404(project_id)
+        if project is None:
+            return jsonify({"error": "not found"}), 404
+
+        plan = get_plan_for_project(g._db, project_id=project_id, plan_id=plan_id)
+        if plan is None:
+            return jsonify({"error": "not found"}), 404
+
+        # plan_json is already JSON: parse only to check it, then send it as stored.
+        try:
+            fastjson.loads(plan.plan_json)
+            body = plan.plan_json.encode("utf-8")
+        except Exception:
+            body = fastjson.dumps_bytes({"raw": plan.plan_json})
+        _plan_detail_cache_put(cache_key, body)
 
-    try:
-        payload = json.loads(plan.plan_json)
-    except Exception:
-        payload = {"raw": plan.plan_json}
-    return jsonify(payload)
+    return current_app.response_class(body, mimetype="application/json")
 
 
 @web.get("/api/media")
 def api_media_list() -> Response:
     # legacy endpoint; will be removed after project UI is stable.
     default_project_id = ensure_default_project(g._db)
-    items = list_media(g._db, project_id=default_project_id)
-    return jsonify(
-        {
-            "items": [
-                {
-                    "id": m.id,
-                    "project_id": m.project_id,
-                    "original_name": m.original_name,
-                    "content_type": m.content_type,
-                    "size_bytes": m.size_bytes,
-                    "created_at": m.created_at,
-                    "url": f"/media/{m.id}",
-                }
-                for m in items
-            ]
-        }
-    )
+    items = list_media_rows(g._db, project_id=default_project_id)
+    return _json_items_response(items, _media_list_item)
 
 
 @web.post("/api/upload")
@@ -1299,12 +1468,10 @@ def api_upload() -> Response:
 
     upload_dir = current_app.config["UPLOAD_DIR"]
     dst = os.path.join(upload_dir, stored_name)
-    f.save(dst)
-
-    size_bytes = os.path.getsize(dst)
+    size_bytes = _save_upload(f, dst)
     content_type = f.mimetype
 
-    media_id = insert_media(
+    media = insert_media(
         g._db,
         project_id=project_id,
         original_name=original_name,
@@ -1315,13 +1482,13 @@ def api_upload() -> Response:
 
     return jsonify(
         {
-            "id": media_id,
+            "id": media.id,
             "project_id": project_id,
             "original_name": original_name,
             "content_type": content_type,
             "size_bytes": size_bytes,
-            "created_at": list_media(g._db, project_id=project_id)[0].created_at,
-            "url": f"/media/{media_id}",
+            "created_at": media.created_at,
+            "url": f"/media/{media.id}",
         }
     )
 
@@ -1344,22 +1511,9 @@ def api_generate() -> Response:
 
     ai = AIClient()
 
-    def _parse_builder_fields(text: str) -> tuple[str, str | None, str | None]:
-        focus = ""
-        audience = None
-        tone = None
-        for line in (x.strip() for x in (text or "").splitlines()):
-            if line.lower().startswith("focus:"):
-                focus = line.split(":", 1)[1].strip()
-            elif line.lower().startswith("audience:"):
-                audience = line.split(":", 1)[1].strip() or None
-            elif line.lower().startswith("tone:"):
-                tone = line.split(":", 1)[1].strip() or None
-        if not focus:
-            focus = (text or "").strip().splitlines()[0].strip() if (text or "").strip() else "(untitled)"
-        return focus, audience, tone
-
     focus, audience, tone = _parse_builder_fields(intent_text)
+    if not focus:
+        focus = intent_text.strip().splitlines()[0].strip() if intent_text.strip() else "(untitled)"
 
     # Legacy endpoint: no media context. Generate a best-effort plan with empty media.
     result = ai.generate_plan(
@@ -1405,7 +1559,7 @@ def api_generate() -> Response:
         )
 
     # Store canonical schema (single source of truth) but return legacy-shaped payload.
-    plan_id = insert_plan(g._db, project_id=project_id, model=ai.model, plan_json=json.dumps(result.plan))
+    plan_id = insert_plan(g._db, project_id=project_id, model=ai.model, plan_json=fastjson.dumps(result.plan))
 
     resp: dict = {"id": plan_id, "project_id": project_id}
 
@@ -18,7 +18,6 @@ import argparse
 from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
-import re
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -26,7 +25,9 @@ VERSION_FILE = ROOT / "VERSION"
 CHANGELOG_FILE = ROOT / "CHANGELOG.md"
 
 
-_SEMVER_RE = re.compile(r"^(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)$")
+def _is_semver_number(part: str) -> bool:
+    # "0", or digits starting with 1-9 (no leading zeros).
+    return part == "0" or (part[:1] in "123456789" and part.isdecimal())
 
 
 @dataclass(frozen=True)
@@ -37,10 +38,11 @@ class SemVer:
 
     @classmethod
     def parse(cls, s: str) -> "SemVer":
-        m = _SEMVER_RE.match(s.strip())
-        if not m:
+        major, _, rest = s.strip().partition(".")
+        minor, _, patch = rest.partition(".")
+        if not (_is_semver_number(major) and _is_semver_number(minor) and _is_semver_number(patch)):
             raise ValueError(f"Invalid semver: {s!r}")
-        return cls(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        return cls(int(major), int(minor), int(patch))
 
     def __str__(self) -> str:
         return f"{self.major}.{self.minor}.{self.patch}"
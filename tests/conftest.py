@@ -1,7 +1,26 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 # Ensure repo root is importable (so `import app` works without packaging).
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope="session")
+def template_db(tmp_path_factory):
+    """An empty, fully migrated database file built once per test session.
+
+    Copy it into a test's tmp dir instead of running the migrations again.
+    """
+    from app import create_app
+
+    base = tmp_path_factory.mktemp("template_db")
+    db_path = base / "template.sqlite3"
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("DATABASE_PATH", str(db_path))
+        mp.setenv("UPLOAD_DIR", str(base / "uploads"))
+        create_app()
+    return db_path
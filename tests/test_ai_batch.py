@@ -0,0 +1,157 @@
+import json
+
+import pytest
+
+from app.ai.batch import PlanBatchError, build_jsonl, fetch_plan_batch_results, poll_plan_batch, submit_plan_batch, wait_for_plan_batch
+from app.ai.client import AIClient
+from app.db.db import (
+    _connect,
+    ensure_default_project,
+    get_plan_batch,
+    insert_plan,
+    insert_plan_batch,
+    list_plan_summaries_for_project,
+    migrate,
+    update_plan_batch_status,
+)
+
+
+def _plan(i):
+    return {"bluesky": {"text": f"Post {i} #flask #bluesky", "hashtags": ["flask", "bluesky"], "alt_text": []}}
+
+
+class _Resp:
+    def __init__(self, status_code, payload=None, text=""):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = text or (json.dumps(payload) if payload is not None else "")
+        self.content = self.text.encode("utf-8")
+
+    def json(self):
+        return self._payload
+
+
+class _FakeSession:
+    def __init__(self):
+        self.calls = []
+        self.output = ""
+
+    def post(self, url, **kwargs):
+        self.calls.append(("POST", url, kwargs))
+        if url.endswith("/v1/files"):
+            return _Resp(200, {"id": "file-in"})
+        if url.endswith("/v1/batches"):
+            return _Resp(200, {"id": "batch_1", "status": "validating"})
+        return _Resp(404, {})
+
+    def get(self, url, **kwargs):
+        self.calls.append(("GET", url, kwargs))
+        if url.endswith("/v1/batches/batch_1"):
+            return _Resp(200, {"id": "batch_1", "status": "completed", "output_file_id": "file-out"})
+        if url.endswith("/v1/files/file-out/content"):
+            return _Resp(200, text=self.output)
+        return _Resp(404, {})
+
+
+def _items():
+    return [
+        {"custom_id": f"p{i}", "focus": f"Focus {i}", "audience": None, "tone": None, "media_summary": [], "generate_targets": ["bluesky"]}
+        for i in range(2)
+    ]
+
+
+def test_build_jsonl_emits_one_chat_request_per_line():
+    ai = AIClient(api_key="sk-test", http=_FakeSession())
+    jsonl, targets_by_id = build_jsonl(ai, _items())
+
+    lines = [json.loads(x) for x in jsonl.decode("utf-8").splitlines()]
+    assert [x["custom_id"] for x in lines] == ["p0", "p1"]
+    assert all(x["method"] == "POST" and x["url"] == "/v1/chat/completions" for x in lines)
+    assert lines[0]["body"]["model"] == ai.model
+    assert targets_by_id == {"p0": ["bluesky"], "p1": ["bluesky"]}
+
+
+def test_submit_poll_and_fetch_batch_results():
+    http = _FakeSession()
+    ai = AIClient(api_key="sk-test", http=http)
+
+    sub = submit_plan_batch(ai, _items())
+    assert sub.batch_id == "batch_1"
+    assert sub.input_file_id == "file-in"
+
+    create = [c for c in http.calls if c[1].endswith("/v1/batches")][0]
+    assert create[2]["json"]["input_file_id"] == "file-in"
+    assert create[2]["json"]["completion_window"] == "24h"
+
+    status = poll_plan_batch(ai, sub.batch_id)
+    assert status.status == "completed"
+    assert status.output_file_id == "file-out"
+
+    # Batch ids are quoted into the URL path.
+    with pytest.raises(PlanBatchError):
+        poll_plan_batch(ai, "batch/../x")
+    assert http.calls[-1][1] == "https://api.openai.com/v1/batches/batch%2F..%2Fx"
+
+    http.output = "\n".join(
+        [
+            json.dumps(
+                {
+                    "custom_id": "p0",
+                    "response": {"status_code": 200, "body": {"choices": [{"message": {"content": json.dumps(_plan(0))}}]}},
+                }
+            ),
+            json.dumps({"custom_id": "p1", "response": {"status_code": 500, "body": {"error": "boom"}}}),
+        ]
+    )
+    results = fetch_plan_batch_results(ai, status.output_file_id, sub.targets_by_id)
+
+    assert results["p0"].ok is True
+    assert results["p0"].plan == _plan(0)
+    assert results["p1"].ok is False
+    assert results["p1"].error.error_type == "api_error"
+
+
+def test_batch_round_trip_through_plan_batches_table(tmp_path):
+    http = _FakeSession()
+    ai = AIClient(api_key="sk-test", http=http)
+    conn = _connect(str(tmp_path / "db.sqlite3"))
+    try:
+        migrate(conn)
+        project_id = ensure_default_project(conn)
+
+        sub = submit_plan_batch(ai, _items())
+        insert_plan_batch(
+            conn,
+            project_id=project_id,
+            batch_id=sub.batch_id,
+            status=sub.status,
+            targets_json=json.dumps(sub.targets_by_id),
+        )
+
+        status = wait_for_plan_batch(ai, sub.batch_id, interval=0)
+        update_plan_batch_status(conn, batch_id=sub.batch_id, status=status.status, output_file_id=status.output_file_id)
+        row = get_plan_batch(conn, batch_id=sub.batch_id)
+        assert (row.status, row.output_file_id) == ("completed", "file-out")
+
+        # CRLF line endings are fine; error rows may carry a null response.
+        plan = _plan(0)
+        plan["bluesky"]["text"] = "Line\u2028two\u0085three #flask #bluesky"
+        content = json.dumps(plan)
+        http.output = "\r\n".join(
+            [
+                json.dumps({"custom_id": "p0", "response": {"status_code": 200, "body": {"choices": [{"message": {"content": content}}]}}}),
+                json.dumps({"custom_id": "p1", "response": None, "error": {"code": "server_error"}}),
+                "",
+            ]
+        )
+        results = fetch_plan_batch_results(ai, row.output_file_id, json.loads(row.targets_json))
+
+        assert results["p0"].ok is True
+        assert results["p0"].plan == plan
+        assert results["p1"].ok is False
+        assert "server_error" in results["p1"].error.details
+
+        plan_id = insert_plan(conn, project_id=project_id, model=ai.model, plan_json=json.dumps(results["p0"].plan))
+        assert [p.id for p in list_plan_summaries_for_project(conn, project_id=project_id)] == [plan_id]
+    finally:
+        conn.close()
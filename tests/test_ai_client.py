@@ -0,0 +1,184 @@
+import asyncio
+import json
+
+import app.ai.client as client_mod
+from app.ai.client import AIClient
+
+
+def _good_plan():
+    return {
+        "bluesky": {"text": "Hello #flask #bluesky", "hashtags": ["flask", "bluesky"], "alt_text": []},
+    }
+
+
+class _Resp:
+    def __init__(self, status_code, payload=None, headers=None, text="", reason=""):
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+        self.text = text or (json.dumps(payload) if payload is not None else "")
+        self.content = self.text.encode("utf-8")
+        self.reason = reason
+
+    def json(self):
+        if self._payload is None:
+            raise ValueError("no json")
+        return self._payload
+
+    def iter_lines(self):
+        return iter(self.content.splitlines())
+
+    def close(self):
+        pass
+
+
+def _sent_payload(kwargs):
+    return json.loads(kwargs["data"])
+
+
+class _FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        self.calls.append((url, kwargs))
+        return self.responses.pop(0)
+
+
+def _chat_response(plan):
+    return _Resp(200, {"choices": [{"message": {"content": json.dumps(plan)}}]})
+
+
+def test_generate_plan_uses_injected_session_and_validates():
+    http = _FakeSession([_chat_response(_good_plan())])
+    ai = AIClient(api_key="sk-test", http=http)
+
+    result = ai.generate_plan(
+        focus="Flask app",
+        audience=None,
+        tone=None,
+        media_summary=[],
+        generate_targets=["bluesky"],
+    )
+
+    assert result.ok is True
+    assert result.plan == _good_plan()
+    assert len(http.calls) == 1
+    url, kwargs = http.calls[0]
+    assert url.endswith("/v1/chat/completions")
+    assert kwargs["headers"]["Authorization"] == "Bearer sk-test"
+    assert _sent_payload(kwargs)["model"] == ai.model
+
+
+def test_generate_plan_maps_429_to_rate_limited(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(client_mod.time, "sleep", sleeps.append)
+    http = _FakeSession(
+        [_Resp(429, {"error": {"message": "slow down"}}, headers={"Retry-After": "7"}) for _ in range(3)]
+    )
+    ai = AIClient(api_key="sk-test", http=http)
+
+    result = ai.generate_plan(focus="x", audience=None, tone=None, media_summary=[])
+
+    assert result.ok is False
+    assert result.error is not None
+    assert result.error.error_type == "rate_limited"
+    assert "~7 seconds" in result.error.human_message
+    assert "attempts: 3" in result.error.details
+    assert sleeps == [7.0, 7.0]
+
+
+def test_generate_plan_retries_transient_5xx(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(client_mod.time, "sleep", sleeps.append)
+    http = _FakeSession([_Resp(503, text="unavailable"), _chat_response(_good_plan())])
+    ai = AIClient(api_key="sk-test", http=http)
+
+    result = ai.generate_plan(focus="x", audience=None, tone=None, media_summary=[], generate_targets=["bluesky"])
+
+    assert result.ok is True
+    assert len(http.calls) == 2
+    assert len(sleeps) == 1 and 1.0 <= sleeps[0] <= 1.5
+
+
+def test_generate_plan_does_not_retry_quota_429(monkeypatch):
+    monkeypatch.setattr(client_mod.time, "sleep", lambda s: None)
+    http = _FakeSession([_Resp(429, {"error": {"code": "insufficient_quota"}})])
+    ai = AIClient(api_key="sk-test", http=http)
+
+    result = ai.generate_plan(focus="x", audience=None, tone=None, media_summary=[])
+
+    assert result.error.error_type == "rate_limited"
+    assert len(http.calls) == 1
+
+
+def test_agenerate_plan_batch_preserves_order():
+    plans = [
+        {"bluesky": {"text": f"Post {i} #flask #bluesky", "hashtags": ["flask", "bluesky"], "alt_text": []}}
+        for i in range(3)
+    ]
+
+    class _OrderedSession(_FakeSession):
+        def post(self, url, **kwargs):
+            self.calls.append((url, kwargs))
+            focus = json.loads(_sent_payload(kwargs)["messages"][1]["content"])["focus"]
+            return _chat_response(plans[int(focus)])
+
+    http = _OrderedSession([])
+    ai = AIClient(api_key="sk-test", http=http)
+
+    batch = [
+        {"focus": str(i), "audience": None, "tone": None, "media_summary": [], "generate_targets": ["bluesky"]}
+        for i in range(3)
+    ]
+    results = asyncio.run(ai.agenerate_plan_batch(batch, concurrency=2))
+
+    assert [r.plan for r in results] == plans
+    assert len(http.calls) == 3
+
+
+def test_generate_plan_rejects_unexpected_response_shape():
+    http = _FakeSession([_Resp(200, {"choices": []}), _Resp(200, {"choices": [{"message": {"content": None}}]})])
+    ai = AIClient(api_key="sk-test", http=http)
+
+    for _ in range(2):
+        result = ai.generate_plan(focus="x", audience=None, tone=None, media_summary=[])
+        assert result.ok is False
+        assert result.error.error_type == "api_error"
+        assert "unexpected API response format" in result.error.human_message
+
+
+def _sse(*chunks):
+    lines = [f"data: {json.dumps({'choices': [{'delta': {'content': c}}]})}" for c in chunks]
+    return _Resp(200, text="\n\n".join(lines + ["data: [DONE]"]))
+
+
+def test_stream_plan_yields_deltas_then_validates():
+    content = json.dumps(_good_plan())
+    http = _FakeSession([_sse(content[:10], content[10:25], content[25:])])
+    ai = AIClient(api_key="sk-test", http=http)
+
+    stream = ai.stream_plan(focus="x", audience=None, tone=None, media_summary=[], generate_targets=["bluesky"])
+    assert stream.result is None
+
+    deltas = list(stream)
+
+    assert "".join(deltas) == content
+    assert stream.result.ok is True
+    assert stream.result.plan == _good_plan()
+    _, kwargs = http.calls[0]
+    assert kwargs["stream"] is True
+    assert _sent_payload(kwargs)["stream"] is True
+
+
+def test_stream_plan_without_api_key_fails_without_request(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    http = _FakeSession([])
+    ai = AIClient(api_key="", http=http)
+
+    stream = ai.stream_plan(focus="x", audience=None, tone=None, media_summary=[])
+
+    assert list(stream) == []
+    assert stream.result.error.error_type == "missing_api_key"
+    assert http.calls == []
@@ -1,8 +1,11 @@
-import io
 import importlib
+import io
+import json
 import random
+import threading
 
 from PIL import Image
+from requests.utils import super_len
 
 
 def _upload_image(client, project_id: int, name: str, content_type: str = "image/png"):
@@ -64,10 +67,12 @@ def test_bluesky_post_happy_path_mocks_requests(tmp_path, monkeypatch):
     up1 = _upload_image(client, p["id"], "a.png")
     up2 = _upload_image(client, p["id"], "b.png")
 
-    # Mock requests.post used by the Bluesky integration module.
+    # Mock the pooled session used by the Bluesky integration module.
     bluesky_mod = importlib.import_module("app.integrations.bluesky")
 
     calls = []
+    # Both blob uploads must be in flight at the same time.
+    uploads_in_flight = threading.Barrier(2, timeout=5)
 
     class _Resp:
         def __init__(self, status_code, payload, headers=None, text=""):
@@ -84,12 +89,19 @@ def test_bluesky_post_happy_path_mocks_requests(tmp_path, monkeypatch):
         if url.endswith("/xrpc/com.atproto.server.createSession"):
             return _Resp(200, {"accessJwt": "jwt", "did": "did:plc:123"})
         if url.endswith("/xrpc/com.atproto.repo.uploadBlob"):
+            uploads_in_flight.wait()
+            # Small images are streamed from disk, not read into memory.
+            body = kwargs["data"]
+            assert hasattr(body, "read")
+            # requests sizes a real file object itself and sends Content-Length.
+            assert "Content-Length" not in kwargs["headers"]
+            assert super_len(body) == len(body.read()) > 0
             return _Resp(200, {"blob": {"$type": "blob", "ref": {"$link": "abc"}}})
         if url.endswith("/xrpc/com.atproto.repo.createRecord"):
             return _Resp(200, {"uri": "at://did:plc:123/app.bsky.feed.post/xyz", "cid": "cid123"})
         return _Resp(500, {"error": "unexpected"}, text="unexpected")
 
-    monkeypatch.setattr(bluesky_mod.requests, "post", fake_post)
+    monkeypatch.setattr(bluesky_mod._session, "post", fake_post)
 
     resp = client.post(
         f"/api/projects/{p['id']}/bluesky_post",
@@ -110,11 +122,11 @@ def test_bluesky_post_happy_path_mocks_requests(tmp_path, monkeypatch):
     # Verify createRecord payload contains correct embed type and images length.
     create_calls = [c for c in calls if c[0].endswith("/xrpc/com.atproto.repo.createRecord")]
     assert len(create_calls) == 1
-    payload = create_calls[0][1]["json"]
+    payload = json.loads(create_calls[0][1]["data"])
     assert payload["collection"] == "app.bsky.feed.post"
     record = payload["record"]
     assert record["embed"]["$type"] == "app.bsky.embed.images"
-    assert len(record["embed"]["images"]) == 2
+    assert [img["alt"] for img in record["embed"]["images"]] == ["Alt A", "Alt B"]
 
 
 def test_bluesky_post_optimizes_large_image_before_upload(tmp_path, monkeypatch):
@@ -149,7 +161,7 @@ def test_bluesky_post_optimizes_large_image_before_upload(tmp_path, monkeypatch)
 
     assert up["size_bytes"] > 1_000_000
 
-    # Mock requests.post used by the Bluesky integration module.
+    # Mock the pooled session used by the Bluesky integration module.
     bluesky_mod = importlib.import_module("app.integrations.bluesky")
 
     calls = []
@@ -177,7 +189,7 @@ def test_bluesky_post_optimizes_large_image_before_upload(tmp_path, monkeypatch)
             return _Resp(200, {"uri": "at://did:plc:123/app.bsky.feed.post/xyz", "cid": "cid123"})
         return _Resp(500, {"error": "unexpected"}, text="unexpected")
 
-    monkeypatch.setattr(bluesky_mod.requests, "post", fake_post)
+    monkeypatch.setattr(bluesky_mod._session, "post", fake_post)
 
     resp = client.post(
         f"/api/projects/{p['id']}/bluesky_post",
@@ -198,6 +210,37 @@ def test_bluesky_post_optimizes_large_image_before_upload(tmp_path, monkeypatch)
     # Verify createRecord includes link facets so the URL is clickable.
     create_calls = [c for c in calls if c[0].endswith("/xrpc/com.atproto.repo.createRecord")]
     assert len(create_calls) == 1
-    record = create_calls[0][1]["json"]["record"]
+    record = json.loads(create_calls[0][1]["data"])["record"]
     assert "facets" in record
     assert isinstance(record["facets"], list) and len(record["facets"]) >= 1
+
+
+def test_build_link_facets_uses_utf8_byte_offsets():
+    from app.integrations.bluesky import build_link_facets
+
+    text = "Café 🎉 https://example.com/a), then https://example.org/ü!"
+    facets = build_link_facets(text)
+
+    encoded = text.encode("utf-8")
+    uris = [f["features"][0]["uri"] for f in facets]
+    assert uris == ["https://example.com/a", "https://example.org/ü"]
+    for f, uri in zip(facets, uris):
+        idx = f["index"]
+        assert encoded[idx["byteStart"] : idx["byteEnd"]].decode("utf-8") == uri
+
+
+def test_clean_error_message_prefers_message_and_truncates_raw_body():
+    import requests
+
+    from app.integrations.bluesky import _clean_error_message
+
+    def _resp(status_code, body: bytes):
+        r = requests.Response()
+        r.status_code = status_code
+        r._content = body
+        r.encoding = "utf-8"
+        return r
+
+    assert _clean_error_message(_resp(400, b'{"error": "InvalidRequest", "message": " Bad record "}')) == "Bad record"
+    assert _clean_error_message(_resp(502, b"<html>" + b"x" * 5000)) == ("<html>" + "x" * 5000)[:512]
+    assert _clean_error_message(_resp(500, b"")) == "HTTP 500"
@@ -0,0 +1,168 @@
+import json
+
+import pytest
+
+from app.db.db import (
+    _connect,
+    bulk_insert_media,
+    ensure_default_project,
+    get_media_by_ids,
+    insert_plan,
+    insert_project,
+    list_plan_summaries_for_project,
+    list_media,
+    list_media_rows,
+    list_projects,
+    list_projects_json,
+    migrate,
+    transaction,
+)
+
+
+def test_bulk_insert_media_returns_ids_in_order(tmp_path):
+    conn = _connect(str(tmp_path / "db.sqlite3"))
+    try:
+        migrate(conn)
+        project_id = ensure_default_project(conn)
+
+        ids = bulk_insert_media(
+            conn,
+            project_id=project_id,
+            rows=[
+                ("a.png", "1.png", "image/png", 10),
+                ("b.jpg", "2.jpg", "image/jpeg", 20),
+                ("c.txt", "3.txt", None, 30),
+            ],
+        )
+
+        assert not conn.in_transaction
+        items = {m.id: m for m in list_media(conn, project_id=project_id)}
+        assert [items[i].original_name for i in ids] == ["a.png", "b.jpg", "c.txt"]
+        rows = list_media_rows(conn, project_id=project_id)
+        assert rows[0] == (ids[2], project_id, "c.txt", None, 30, items[ids[2]].created_at)
+        assert [r[0] for r in rows] == [m.id for m in list_media(conn, project_id=project_id)]
+        assert bulk_insert_media(conn, project_id=project_id, rows=[]) == []
+    finally:
+        conn.close()
+
+
+def test_requests_reuse_the_thread_connection(tmp_path, monkeypatch):
+    from flask import g
+
+    from app import create_app
+
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "pool.sqlite3"))
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path / "uploads"))
+    app = create_app()
+
+    seen = []
+    for _ in range(2):
+        with app.test_request_context("/"):
+            app.preprocess_request()
+            seen.append(g._db)
+            g._db.execute("INSERT INTO projects (created_at, title) VALUES ('t', 'uncommitted')")
+            app.do_teardown_request()
+
+    assert seen[0] is seen[1]
+    # Teardown rolled back the uncommitted insert.
+    assert seen[0].execute("SELECT COUNT(*) FROM projects WHERE title = 'uncommitted'").fetchone()[0] == 0
+
+
+def test_pooled_connection_runs_optimize_after_the_interval(tmp_path, monkeypatch):
+    from app.db import db as db_mod
+
+    path = str(tmp_path / "pool.sqlite3")
+    conn = db_mod._pooled_connection(path)
+    try:
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        assert db_mod._pooled_connection(path) is conn
+        assert "PRAGMA optimize" not in statements
+
+        monkeypatch.setattr(db_mod, "POOLED_OPTIMIZE_INTERVAL_SECONDS", 0)
+        assert db_mod._pooled_connection(path) is conn
+        assert "PRAGMA optimize" in statements
+    finally:
+        db_mod._local.conns.pop(path).close()
+
+
+def test_transaction_commits_once_and_rolls_back_on_error(tmp_path):
+    conn = _connect(str(tmp_path / "tx.sqlite3"))
+    try:
+        migrate(conn)
+        before = len(list_projects(conn))
+
+        with transaction(conn):
+            insert_project(conn, title="A", intent_text="", commit=False)
+            insert_project(conn, title="B", intent_text="", commit=False)
+        assert len(list_projects(conn)) == before + 2
+
+        with pytest.raises(RuntimeError):
+            with transaction(conn):
+                insert_project(conn, title="C", intent_text="", commit=False)
+                raise RuntimeError("boom")
+        assert not conn.in_transaction
+        assert [p.title for p in list_projects(conn)].count("C") == 0
+    finally:
+        conn.close()
+
+
+def test_default_project_id_is_cached_on_the_connection(tmp_path):
+    conn = _connect(str(tmp_path / "default.sqlite3"))
+    try:
+        migrate(conn)
+        project_id = ensure_default_project(conn)
+        assert conn.default_project_id == project_id
+
+        conn.execute("UPDATE projects SET title = 'renamed' WHERE id = ?", (project_id,))
+        conn.commit()
+        # Served from the cache: no lookup, no new default project.
+        assert ensure_default_project(conn) == project_id
+    finally:
+        conn.close()
+
+
+def test_list_projects_json_matches_list_projects(tmp_path):
+    conn = _connect(str(tmp_path / "pj.sqlite3"))
+    try:
+        migrate(conn)
+        insert_project(conn, title='Quote " back\\slash', intent_text="line\nbreak\ttab")
+        insert_project(conn, title="Café 🚀 \u2028", intent_text="")
+
+        expected = [p._asdict() for p in list_projects(conn)]
+        assert [json.loads(t) for t in list_projects_json(conn)] == expected
+    finally:
+        conn.close()
+
+
+def test_plan_summaries_use_json1(tmp_path):
+    conn = _connect(str(tmp_path / "db.sqlite3"))
+    try:
+        migrate(conn)
+        project_id = ensure_default_project(conn)
+        ai_id = insert_plan(conn, project_id=project_id, model="m", plan_json='{"bluesky": {"text": "hi"}}')
+        tpl_id = insert_plan(conn, project_id=project_id, model="template", plan_json='{"meta": {"is_template": true}}')
+        bad_id = insert_plan(conn, project_id=project_id, model="m", plan_json="not json")
+
+        summaries = list_plan_summaries_for_project(conn, project_id=project_id)
+        assert [(p.id, p.is_template) for p in summaries] == [(bad_id, False), (tpl_id, True), (ai_id, False)]
+    finally:
+        conn.close()
+
+
+def test_get_media_by_ids_is_project_scoped(tmp_path):
+    conn = _connect(str(tmp_path / "db.sqlite3"))
+    try:
+        migrate(conn)
+        p1 = ensure_default_project(conn)
+        p2 = insert_project(conn, title="Other", intent_text="")
+        a, b = bulk_insert_media(conn, project_id=p1, rows=[("a.png", "1.png", "image/png", 1), ("b.png", "2.png", "image/png", 2)])
+        (other,) = bulk_insert_media(conn, project_id=p2, rows=[("c.png", "3.png", "image/png", 3)])
+
+        found = get_media_by_ids(conn, project_id=p1, media_ids=[b, other, a, b, 999])
+        assert sorted(found) == [a, b]
+        assert found[b].original_name == "b.png"
+        assert get_media_by_ids(conn, project_id=p1, media_ids=[]) == {}
+    finally:
+        conn.close()
@@ -1,6 +1,8 @@
 import io
+import os
 import random
 
+import pytest
 from PIL import Image
 
 
@@ -30,3 +32,118 @@ def test_optimize_for_bluesky_compresses_under_1mb(tmp_path):
     # Ensure result bytes are a decodable JPEG.
     img2 = Image.open(io.BytesIO(out["bytes"]))
     assert img2.format == "JPEG"
+
+
+def test_optimize_for_bluesky_async_runs_inline_without_workers(tmp_path, monkeypatch):
+    from app.core import image_optimize
+    from app.core.image_optimize import ImageOptimizationError, optimize_for_bluesky_async
+
+    monkeypatch.setattr(image_optimize, "_pool", None)
+    monkeypatch.setattr(image_optimize, "_pool_unavailable", False)
+
+    p = tmp_path / "small.png"
+    Image.new("RGB", (64, 48), (200, 10, 10)).save(p, format="PNG")
+
+    fut = optimize_for_bluesky_async(str(p), "image/png")
+    assert fut.done()
+    assert fut.result()["out_mime"] == "image/jpeg"
+    assert image_optimize._pool is None
+
+    bad = optimize_for_bluesky_async(str(tmp_path / "missing.png"), "image/png")
+    assert isinstance(bad.exception(), ImageOptimizationError)
+
+
+@pytest.mark.parametrize("outcome", ["broken", "cancelled"])
+def test_optimize_for_bluesky_async_falls_back_inline_when_pool_fails(tmp_path, monkeypatch, outcome):
+    import threading
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    from app.core import image_optimize
+    from app.core.image_optimize import optimize_for_bluesky_async
+
+    # "broken" is what spawn looks like under an embedded server (mod_wsgi): the
+    # workers never come up. "cancelled" is a job dropped by shutdown(cancel_futures=True).
+    class _FailingPool:
+        shut_down = False
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def submit(self, *args, **kwargs):
+            fut = Future()
+            if outcome == "broken":
+                fut.set_exception(BrokenProcessPool("A child process terminated abruptly"))
+            else:
+                fut.cancel()
+            return fut
+
+        def shutdown(self, **kwargs):
+            _FailingPool.shut_down = True
+
+    monkeypatch.setattr(image_optimize, "ProcessPoolExecutor", _FailingPool)
+    monkeypatch.setattr(image_optimize, "_pool", None)
+    monkeypatch.setattr(image_optimize, "_pool_unavailable", False)
+
+    ran_on = []
+    real_optimize = image_optimize.optimize_for_bluesky
+
+    def _recording_optimize(*args, **kwargs):
+        ran_on.append(threading.current_thread())
+        return real_optimize(*args, **kwargs)
+
+    monkeypatch.setattr(image_optimize, "optimize_for_bluesky", _recording_optimize)
+
+    p = tmp_path / "small.png"
+    Image.new("RGB", (64, 48), (10, 10, 200)).save(p, format="PNG")
+
+    fut = optimize_for_bluesky_async(str(p), "image/png", workers=1)
+    assert fut.result(timeout=30)["out_mime"] == "image/jpeg"
+    # The fallback runs on its own thread, not in the future's done-callback.
+    assert ran_on and ran_on[0] is not threading.current_thread()
+    assert image_optimize._pool_unavailable is True
+    assert image_optimize._pool is None
+    assert _FailingPool.shut_down is True
+
+    # Later calls don't try the pool again.
+    assert optimize_for_bluesky_async(str(p), "image/png", workers=1).done()
+
+
+def test_optimize_for_bluesky_reuses_cached_result(tmp_path, monkeypatch):
+    from app.core import image_optimize
+    from app.core.image_optimize import optimize_for_bluesky
+
+    p = tmp_path / "small.png"
+    Image.new("RGB", (64, 48), (10, 200, 10)).save(p, format="PNG")
+    cache_dir = tmp_path / "cache"
+
+    first = optimize_for_bluesky(str(p), "image/png", cache_dir=str(cache_dir))
+    assert len(list(cache_dir.glob("*.jpg"))) == 1
+
+    def _boom(*args, **kwargs):
+        raise AssertionError("should have been served from the cache")
+
+    monkeypatch.setattr(image_optimize, "_optimize_uncached", _boom)
+    (cached_jpg,) = cache_dir.glob("*.jpg")
+    os.utime(cached_jpg, (1_000, 1_000))
+    second = optimize_for_bluesky(str(p), "image/png", cache_dir=str(cache_dir))
+
+    assert second == first
+    # A hit marks the entry as recently used.
+    assert cached_jpg.stat().st_mtime > 1_000
+
+
+def test_cache_prune_drops_least_recently_used_entries(tmp_path):
+    from app.core.image_optimize import _cache_prune
+
+    for i, key in enumerate(["old", "mid", "new"]):
+        (tmp_path / f"{key}.jpg").write_bytes(b"x" * 100)
+        (tmp_path / f"{key}.json").write_text("{}")
+        os.utime(tmp_path / f"{key}.jpg", (1_000 + i, 1_000 + i))
+
+    _cache_prune(str(tmp_path), 250)
+
+    assert sorted(x.name for x in tmp_path.iterdir()) == ["mid.jpg", "mid.json", "new.jpg", "new.json"]
+
+    _cache_prune(str(tmp_path), 250)
+    assert len(list(tmp_path.glob("*.jpg"))) == 2
@@ -0,0 +1,28 @@
+from decimal import Decimal
+from typing import NamedTuple
+
+from flask import jsonify
+
+from app import create_app
+
+
+class _Point(NamedTuple):
+    x: int
+    y: int
+
+
+def test_fast_json_provider_round_trips_and_falls_back(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "db.sqlite3"))
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path / "uploads"))
+    app = create_app()
+
+    with app.test_request_context():
+        resp = jsonify({"title": "Café 🎉", "tags": ("a", "b")})
+        assert resp.mimetype == "application/json"
+        assert resp.get_json() == {"title": "Café 🎉", "tags": ["a", "b"]}
+
+        # Types the fast path can't encode still go through Flask's encoder.
+        assert jsonify({"p": _Point(1, 2), "d": Decimal("1.5")}).get_json() == {"p": [1, 2], "d": "1.5"}
+
+    client = app.test_client()
+    assert client.post("/api/projects", data=b"{not json", content_type="application/json").status_code == 400
@@ -1,5 +1,10 @@
+import importlib
 import sqlite3
 
+import pytest
+
+from flask import Flask
+
 from app import create_app
 
 
@@ -19,7 +24,9 @@ def test_startup_migrates_legacy_media_db(tmp_path, monkeypatch):
                 created_at TEXT NOT NULL
             );
             INSERT INTO media (original_name, stored_name, content_type, size_bytes, created_at)
-            VALUES ('old.png', 'old.png', 'image/png', 123, '2020-01-01T00:00:00+00:00');
+            VALUES ('old.png', 'old.png', 'Image/PNG', 123, '2020-01-01T00:00:00+00:00'),
+                   ('gone.png', 'gone.png', 'image/png', 1, '2020-01-01T00:00:00+00:00');
+            DELETE FROM media WHERE original_name = 'gone.png';
             """
         )
         conn.commit()
@@ -43,8 +50,44 @@ def test_startup_migrates_legacy_media_db(tmp_path, monkeypatch):
         assert len(media_rows) == 1
         assert media_rows[0]["project_id"] is not None
         assert int(media_rows[0]["project_id"]) == int(projects[0]["id"])
+        assert media_rows[0]["content_type"] == "image/png"
+
+        # The column is rebuilt NOT NULL once backfilled; ids keep counting up.
+        notnull = {r["name"]: r["notnull"] for r in conn2.execute("PRAGMA table_info(media)")}
+        assert notnull["project_id"] == 1
+        with pytest.raises(sqlite3.IntegrityError):
+            conn2.execute(
+                "INSERT INTO media (original_name, stored_name, size_bytes, created_at) VALUES ('x', 'x', 1, 't')"
+            )
+        cur = conn2.execute(
+            "INSERT INTO media (original_name, stored_name, size_bytes, created_at, project_id) VALUES ('x', 'x', 1, 't', ?)",
+            (projects[0]["id"],),
+        )
+        assert cur.lastrowid == 3
 
         # plans table exists even if empty.
         conn2.execute("SELECT * FROM plans").fetchall()
     finally:
         conn2.close()
+
+
+def test_create_app_migrates_each_db_once(tmp_path, monkeypatch):
+    db_mod = importlib.import_module("app.db.db")
+
+    calls = []
+    real_migrate = db_mod.migrate
+    monkeypatch.setattr(db_mod, "migrate", lambda conn: (calls.append(1), real_migrate(conn)))
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "once.sqlite3"))
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path / "uploads"))
+
+    create_app()
+    app = create_app()
+    assert len(calls) == 1
+
+    # Request hooks are still wired on every app.
+    assert app.test_client().get("/api/projects").status_code == 200
+
+    fresh = Flask(__name__)
+    fresh.config["DATABASE_PATH"] = str(tmp_path / "once.sqlite3")
+    db_mod.init_db(fresh, force=True)
+    assert len(calls) == 2
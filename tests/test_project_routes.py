@@ -1,19 +1,28 @@
+import copy
 import io
 import json
 import re
+import shutil
 import sqlite3
-import importlib
+import time
+
+import pytest
 
 from app import create_app
+from app.web import routes as _routes_mod
 
 
 _HASHTAG_RE = re.compile(r"(?<!\\w)#([A-Za-z0-9_]+)")
+_HASHTAG_FINDALL = _HASHTAG_RE.findall
 
 
 def _extract_hashtags_from_text(text: str) -> list[str]:
-    if not text:
-        return []
-    return _HASHTAG_RE.findall(text)
+    return _HASHTAG_FINDALL(text) if text else []
+
+
+def _assert_inline_hashtags_match(bsky: dict) -> None:
+    # Hashtag single source of truth: inline hashtags must match array exactly.
+    assert _extract_hashtags_from_text(bsky.get("text") or "") == (bsky.get("hashtags") or [])
 
 
 def _good_plan():
@@ -41,37 +50,40 @@ class _FakeAIClient:
 
         return PlanGenerationResult(ok=True, plan=_good_plan(), warnings=[], error=None)
 
+    def stream_plan(self, **kwargs):
+        content = json.dumps(_good_plan())
+        result = self.generate_plan(**kwargs)
 
-class _FakeAIClientInvalidJson:
-    def __init__(self, *, model=None, api_key=None):
-        self.model = model or "gpt-4o-mini"
+        class _Stream:
+            def __init__(self):
+                self.result = None
 
-    def generate_plan(self, **_kwargs):
-        from app.ai.client import AIError, PlanGenerationResult
+            def __iter__(self):
+                yield content[:20]
+                yield content[20:]
+                self.result = result
 
-        return PlanGenerationResult(
-            ok=False,
-            plan=None,
-            warnings=[],
-            error=AIError(error_type="invalid_json", human_message="AI generation failed: response was not valid JSON."),
-        )
+        return _Stream()
 
 
-class _FakeAIClientWithBannedHashtags:
-    def __init__(self, *, model=None, api_key=None):
-        self.model = model or "fake"
+def _fake_ai_client(*, plan=None, error=None):
+    # AIClient stand-in whose generate_plan() returns a fresh copy of `plan`, or fails with `error`.
+    from app.ai.client import PlanGenerationResult
+
+    class _FakeAI:
+        def __init__(self, *, model=None, api_key=None):
+            self.model = model or "fake"
+
+        def generate_plan(self, **_kwargs):
+            return PlanGenerationResult(ok=error is None, plan=copy.deepcopy(plan), warnings=[], error=error)
+
+    return _FakeAI
 
-    def generate_plan(self, **_kwargs):
-        from app.ai.client import PlanGenerationResult
 
-        plan = {
-            "bluesky": {
-                "text": "Shipping a Flask + Bluesky update.\n\n#creators #content",
-                "hashtags": ["creators", "content"],
-                "alt_text": ["File: a.txt"],
-            },
-        }
-        return PlanGenerationResult(ok=True, plan=plan, warnings=[], error=None)
+@pytest.fixture(autouse=True)
+def _seed_db(tmp_path, template_db):
+    # Start from the pre-migrated template rather than building the schema per test.
+    shutil.copyfile(template_db, tmp_path / "test.sqlite3")
 
 
 def _make_client(tmp_path, monkeypatch):
@@ -82,14 +94,41 @@ def _make_client(tmp_path, monkeypatch):
     monkeypatch.setenv("UPLOAD_DIR", str(upload_dir))
     # Tests should not depend on external AI.
     monkeypatch.delenv("OPENAI_API_KEY", raising=False)
-    routes_mod = importlib.import_module("app.web.routes")
-    monkeypatch.setattr(routes_mod, "AIClient", _FakeAIClient)
+    monkeypatch.setattr(_routes_mod, "AIClient", _FakeAIClient)
 
     app = create_app()
     app.config.update(TESTING=True)
     return app.test_client(), db_path
 
 
+def _project_with_upload(client, intent_text="Intent"):
+    p = client.post("/api/projects", json={"title": "P1", "intent_text": intent_text}).get_json()["project"]
+    uploaded = client.post(
+        f"/api/projects/{p['id']}/upload",
+        data={"file": (io.BytesIO(b"abc"), "a.txt")},
+        content_type="multipart/form-data",
+    ).get_json()
+    return p, uploaded
+
+
+def _media_created_at(client, project_id, media_id):
+    items = client.get(f"/api/projects/{project_id}/media").get_json()["items"]
+    return next(m["created_at"] for m in items if m["id"] == media_id)
+
+
+def _parse_sse(body: str) -> list:
+    # Frame like EventSource does: LF-separated lines, `data:` lines joined with LF.
+    events = []
+    for block in body.split("\n\n"):
+        if not block.strip():
+            continue
+        lines = block.split("\n")
+        name = lines[0].removeprefix("event: ")
+        data = "\n".join(line.removeprefix("data: ") for line in lines[1:])
+        events.append((name, json.loads(data)))
+    return events
+
+
 def test_create_project(tmp_path, monkeypatch):
     client, _db_path = _make_client(tmp_path, monkeypatch)
 
@@ -104,6 +143,22 @@ def test_create_project(tmp_path, monkeypatch):
     assert data["project"]["intent_text"] == "Make a post about my clip"
 
 
+def test_list_projects_streams_items_across_batches(tmp_path, monkeypatch):
+    client, _db_path = _make_client(tmp_path, monkeypatch)
+    monkeypatch.setattr(_routes_mod, "_ITEMS_STREAM_BATCH", 2)
+
+    for i in range(5):
+        client.post("/api/projects", json={"title": f"P{i}", "intent_text": "x"})
+
+    resp = client.get("/api/projects")
+    assert resp.status_code == 200
+    assert resp.is_streamed
+    items = json.loads(resp.get_data())["items"]
+    assert {"P0", "P1", "P2", "P3", "P4"} <= {p["title"] for p in items}
+    assert len({p["id"] for p in items}) == len(items)
+    assert set(items[0]) == {"id", "title", "intent_text", "created_at"}
+
+
 def test_upload_media_assigned_to_project_and_scoped_listing(tmp_path, monkeypatch):
     client, db_path = _make_client(tmp_path, monkeypatch)
 
@@ -115,6 +170,8 @@ def test_upload_media_assigned_to_project_and_scoped_listing(tmp_path, monkeypat
     assert resp.status_code == 200
     uploaded = resp.get_json()
     assert uploaded["project_id"] == p["id"]
+    assert uploaded["size_bytes"] == 3
+    assert uploaded["created_at"] == _media_created_at(client, p["id"], uploaded["id"])
 
     # Listing is project-scoped.
     resp_list = client.get(f"/api/projects/{p['id']}/media")
@@ -159,6 +216,14 @@ def test_generate_requires_selected_media_ids_and_stores_plan(tmp_path, monkeypa
     bad2 = client.post(f"/api/projects/{p['id']}/generate", json={"intent_text": "x", "selected_media_ids": []})
     assert bad2.status_code == 400
 
+    # Unknown id -> 400 naming the first missing one
+    bad3 = client.post(
+        f"/api/projects/{p['id']}/generate",
+        json={"intent_text": "x", "selected_media_ids": [uploaded["id"], 9998, 9999]},
+    )
+    assert bad3.status_code == 400
+    assert bad3.get_json()["error"] == "media_id 9998 not found in this project"
+
     # Success
     ok = client.post(
         f"/api/projects/{p['id']}/generate",
@@ -183,16 +248,110 @@ def test_generate_requires_selected_media_ids_and_stores_plan(tmp_path, monkeypa
         conn.close()
 
 
+def test_generate_stream_sends_deltas_then_result_event(tmp_path, monkeypatch):
+    client, _ = _make_client(tmp_path, monkeypatch)
+
+    p, uploaded = _project_with_upload(client)
+
+    bad = client.post(f"/api/projects/{p['id']}/generate/stream", json={"intent_text": "x"})
+    assert bad.status_code == 400
+
+    resp = client.post(
+        f"/api/projects/{p['id']}/generate/stream",
+        json={"intent_text": "x", "selected_media_ids": [uploaded["id"]]},
+    )
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/event-stream"
+
+    events = _parse_sse(resp.get_data(as_text=True))
+
+    deltas = [d["content"] for name, d in events if name == "delta"]
+    assert json.loads("".join(deltas)) == _good_plan()
+    name, result = events[-1]
+    assert name == "result"
+    assert result["ok"] is True
+    assert result["id"]
+    assert result["bluesky"]["hashtags"]
+
+    plans = client.get(f"/api/projects/{p['id']}/plans").get_json()
+    assert any(item["id"] == result["id"] for item in plans["items"])
+
+
+def test_generate_stream_keeps_unicode_line_separators_inside_events(tmp_path, monkeypatch):
+    client, _ = _make_client(tmp_path, monkeypatch)
+
+    from app.ai.client import PlanGenerationResult
+
+    plan = _good_plan()
+    plan["bluesky"]["text"] = "Hello\u2028world\u0085again #petdefender #petsafety"
+
+    class _Stream:
+        def __init__(self):
+            self.result = None
+
+        def __iter__(self):
+            yield "line\u2028sep"
+            yield "next\u2029\u0085"
+            self.result = PlanGenerationResult(ok=True, plan=copy.deepcopy(plan), warnings=[], error=None)
+
+    class _FakeAI(_FakeAIClient):
+        def stream_plan(self, **_kwargs):
+            return _Stream()
+
+    monkeypatch.setattr(_routes_mod, "AIClient", _FakeAI)
+    p, uploaded = _project_with_upload(client)
+
+    resp = client.post(
+        f"/api/projects/{p['id']}/generate/stream",
+        json={"intent_text": "x", "selected_media_ids": [uploaded["id"]]},
+    )
+    assert resp.status_code == 200
+
+    events = _parse_sse(resp.get_data(as_text=True))
+    assert [d["content"] for name, d in events if name == "delta"] == ["line\u2028sep", "next\u2029\u0085"]
+    name, result = events[-1]
+    assert name == "result"
+    assert result["ok"] is True
+    assert "\u2028" in result["bluesky"]["text"]
+
+
+def test_generate_job_returns_202_then_result_on_poll(tmp_path, monkeypatch):
+    client, _ = _make_client(tmp_path, monkeypatch)
+
+    p, uploaded = _project_with_upload(client)
+
+    bad = client.post(f"/api/projects/{p['id']}/generate/jobs", json={"intent_text": "x"})
+    assert bad.status_code == 400
+
+    resp = client.post(
+        f"/api/projects/{p['id']}/generate/jobs",
+        json={"intent_text": "x", "selected_media_ids": [uploaded["id"]]},
+    )
+    assert resp.status_code == 202
+    job = resp.get_json()
+    assert resp.headers["Location"] == job["status_url"] == f"/api/jobs/{job['job_id']}"
+
+    # Job state is in the DB, so poll the status URL the way a client would.
+    deadline = time.monotonic() + 5
+    done = client.get(job["status_url"])
+    while done.status_code == 202 and time.monotonic() < deadline:
+        time.sleep(0.01)
+        done = client.get(job["status_url"])
+    assert done.status_code == 200
+    result = done.get_json()
+    assert result["ok"] is True
+    assert result["bluesky"]["hashtags"]
+
+    plans = client.get(f"/api/projects/{p['id']}/plans").get_json()["items"]
+    assert any(item["id"] == result["id"] for item in plans)
+
+    assert client.get("/api/jobs/nope").status_code == 404
+
+
 def test_delete_media_removes_db_row_and_file(tmp_path, monkeypatch):
     client, db_path = _make_client(tmp_path, monkeypatch)
 
-    p = client.post("/api/projects", json={"title": "P1", "intent_text": "Intent"}).get_json()["project"]
-
-    uploaded = client.post(
-        f"/api/projects/{p['id']}/upload",
-        data={"file": (io.BytesIO(b"abc"), "a.txt")},
-        content_type="multipart/form-data",
-    ).get_json()
+    p, uploaded = _project_with_upload(client)
 
     # Lookup stored_name so we can verify the file is deleted.
     conn = sqlite3.connect(str(db_path))
@@ -226,13 +385,7 @@ def test_delete_media_removes_db_row_and_file(tmp_path, monkeypatch):
 def test_generate_bluesky_only_omits_youtube_in_response_and_storage(tmp_path, monkeypatch):
     client, db_path = _make_client(tmp_path, monkeypatch)
 
-    p = client.post("/api/projects", json={"title": "P1", "intent_text": "Intent"}).get_json()["project"]
-
-    uploaded = client.post(
-        f"/api/projects/{p['id']}/upload",
-        data={"file": (io.BytesIO(b"abc"), "a.txt")},
-        content_type="multipart/form-data",
-    ).get_json()
+    p, uploaded = _project_with_upload(client)
 
     ok = client.post(
         f"/api/projects/{p['id']}/generate",
@@ -303,20 +456,29 @@ def test_plan_history_is_project_scoped(tmp_path, monkeypatch):
     cross = client.get(f"/api/projects/{p1['id']}/plans/{plan2['id']}")
     assert cross.status_code == 404
 
+    # Detail bodies are cached (plans are write-once); a repeat GET skips the DB.
+    detail = client.get(f"/api/projects/{p1['id']}/plans/{plan1['id']}")
+    assert detail.status_code == 200
+    assert detail.get_json()["bluesky"]["hashtags"] == plan1["bluesky"]["hashtags"]
+
+    def _no_db(*_args, **_kwargs):
+        raise AssertionError("should have been served from the cache")
+
+    monkeypatch.setattr(_routes_mod, "get_plan_for_project", _no_db)
+    again = client.get(f"/api/projects/{p1['id']}/plans/{plan1['id']}")
+    assert again.get_data() == detail.get_data()
+
 
 def test_generate_returns_ok_false_on_invalid_json(tmp_path, monkeypatch):
     client, _db_path = _make_client(tmp_path, monkeypatch)
 
     # Override AIClient for this test to simulate invalid_json.
-    routes_mod = importlib.import_module("app.web.routes")
-    monkeypatch.setattr(routes_mod, "AIClient", _FakeAIClientInvalidJson)
+    from app.ai.client import AIError
 
-    p = client.post("/api/projects", json={"title": "P1", "intent_text": "Intent"}).get_json()["project"]
-    uploaded = client.post(
-        f"/api/projects/{p['id']}/upload",
-        data={"file": (io.BytesIO(b"abc"), "a.txt")},
-        content_type="multipart/form-data",
-    ).get_json()
+    error = AIError(error_type="invalid_json", human_message="AI generation failed: response was not valid JSON.")
+    monkeypatch.setattr(_routes_mod, "AIClient", _fake_ai_client(error=error))
+
+    p, uploaded = _project_with_upload(client)
 
     resp = client.post(
         f"/api/projects/{p['id']}/generate",
@@ -337,24 +499,17 @@ def test_generate_template_mode_succeeds_without_api_key(tmp_path, monkeypatch):
     monkeypatch.setenv("UPLOAD_DIR", str(upload_dir))
     monkeypatch.delenv("OPENAI_API_KEY", raising=False)
 
-    routes_mod = importlib.import_module("app.web.routes")
-
     class _ExplodingAIClient:
         def __init__(self, *args, **kwargs):
             raise AssertionError("AIClient should not be constructed in template_mode")
 
-    monkeypatch.setattr(routes_mod, "AIClient", _ExplodingAIClient)
+    monkeypatch.setattr(_routes_mod, "AIClient", _ExplodingAIClient)
 
     app = create_app()
     app.config.update(TESTING=True)
     client = app.test_client()
 
-    p = client.post("/api/projects", json={"title": "P1", "intent_text": "Focus: Demo"}).get_json()["project"]
-    uploaded = client.post(
-        f"/api/projects/{p['id']}/upload",
-        data={"file": (io.BytesIO(b"abc"), "a.txt")},
-        content_type="multipart/form-data",
-    ).get_json()
+    p, uploaded = _project_with_upload(client, intent_text="Focus: Demo")
 
     resp = client.post(
         f"/api/projects/{p['id']}/generate",
@@ -382,28 +537,57 @@ def test_generate_template_mode_succeeds_without_api_key(tmp_path, monkeypatch):
     yt_title = (data.get("youtube", {}).get("title") or "")
     assert "🎬" in yt_title
 
-    # Hashtag single source of truth: inline hashtags must match array exactly.
-    bsky = data.get("bluesky", {})
-    inline = _extract_hashtags_from_text(bsky.get("text") or "")
-    assert inline == (bsky.get("hashtags") or [])
+    _assert_inline_hashtags_match(data.get("bluesky", {}))
 
     from app.ai.plan_validation import validate_plan
 
     assert validate_plan(data).ok is True
 
 
+def test_generate_template_mode_reuses_plan_for_identical_inputs(tmp_path, monkeypatch):
+    from collections import OrderedDict
+
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "test.sqlite3"))
+    monkeypatch.setenv("UPLOAD_DIR", str(tmp_path / "uploads"))
+
+    monkeypatch.setattr(_routes_mod, "_template_plan_cache", OrderedDict())
+    calls = []
+    real_validate = _routes_mod.validate_plan
+    monkeypatch.setattr(_routes_mod, "validate_plan", lambda *a, **kw: (calls.append(1), real_validate(*a, **kw))[1])
+
+    app = create_app()
+    client = app.test_client()
+    p, uploaded = _project_with_upload(client, intent_text="Focus: Demo")
+
+    def _generate(focus):
+        return client.post(
+            f"/api/projects/{p['id']}/generate",
+            json={"intent_text": f"Focus: {focus}", "selected_media_ids": [uploaded["id"]], "template_mode": True},
+        ).get_json()
+
+    first = _generate("Demo")
+    second = _generate("Demo")
+    assert len(calls) == 1
+    assert first["id"] != second["id"]
+    assert first["bluesky"] == second["bluesky"] and first["youtube"] == second["youtube"]
+
+    _generate("Something else")
+    assert len(calls) == 2
+
+
 def test_generate_ai_mode_drops_banned_generic_hashtags_when_not_production_related(tmp_path, monkeypatch):
     client, _db_path = _make_client(tmp_path, monkeypatch)
 
-    routes_mod = importlib.import_module("app.web.routes")
-    monkeypatch.setattr(routes_mod, "AIClient", _FakeAIClientWithBannedHashtags)
+    plan = {
+        "bluesky": {
+            "text": "Shipping a Flask + Bluesky update.\n\n#creators #content",
+            "hashtags": ["creators", "content"],
+            "alt_text": ["File: a.txt"],
+        },
+    }
+    monkeypatch.setattr(_routes_mod, "AIClient", _fake_ai_client(plan=plan))
 
-    p = client.post("/api/projects", json={"title": "P1", "intent_text": "Focus: Flask + Bluesky post builder"}).get_json()["project"]
-    uploaded = client.post(
-        f"/api/projects/{p['id']}/upload",
-        data={"file": (io.BytesIO(b"abc"), "a.txt")},
-        content_type="multipart/form-data",
-    ).get_json()
+    p, uploaded = _project_with_upload(client, intent_text="Focus: Flask + Bluesky post builder")
 
     resp = client.post(
         f"/api/projects/{p['id']}/generate",
@@ -419,48 +603,29 @@ def test_generate_ai_mode_drops_banned_generic_hashtags_when_not_production_rela
     assert "creators" not in [t.lower() for t in tags]
     assert "content" not in [t.lower() for t in tags]
 
-    # Hashtag single source of truth: inline hashtags must match array exactly.
-    bsky = data.get("bluesky", {})
-    inline = _extract_hashtags_from_text(bsky.get("text") or "")
-    assert inline == (bsky.get("hashtags") or [])
+    _assert_inline_hashtags_match(data.get("bluesky", {}))
 
 
 def test_generate_ai_mode_injects_cta_target_when_ai_omits_it(tmp_path, monkeypatch):
     client, _db_path = _make_client(tmp_path, monkeypatch)
 
-    # Override AIClient for this test to simulate an AI plan that forgets to include the CTA target.
-    routes_mod = importlib.import_module("app.web.routes")
-
-    from app.ai.client import PlanGenerationResult
-
-    class _FakeAIClientMissingCta:
-        def __init__(self, *args, **kwargs):
-            self.model = "fake"
+    # Simulate an AI plan that forgets to include the CTA target.
+    plan = {
+        "bluesky": {
+            "text": "A short post.\n\n#demo #update",
+            "hashtags": ["demo", "update"],
+            "alt_text": ["File: a.txt"],
+        },
+        "youtube": {
+            "title": "Demo",
+            "description": "Paragraph one.\n\nParagraph two.",
+            "tags": ["demo"] * 8,
+            "category": "People & Blogs",
+        },
+    }
+    monkeypatch.setattr(_routes_mod, "AIClient", _fake_ai_client(plan=plan))
 
-        def generate_plan(self, **_kwargs):
-            plan = {
-                "bluesky": {
-                    "text": "A short post.\n\n#demo #update",
-                    "hashtags": ["demo", "update"],
-                    "alt_text": ["File: a.txt"],
-                },
-                "youtube": {
-                    "title": "Demo",
-                    "description": "Paragraph one.\n\nParagraph two.",
-                    "tags": ["demo"] * 8,
-                    "category": "People & Blogs",
-                },
-            }
-            return PlanGenerationResult(ok=True, plan=plan, warnings=[], error=None)
-
-    monkeypatch.setattr(routes_mod, "AIClient", _FakeAIClientMissingCta)
-
-    p = client.post("/api/projects", json={"title": "P1", "intent_text": "Focus: Demo"}).get_json()["project"]
-    uploaded = client.post(
-        f"/api/projects/{p['id']}/upload",
-        data={"file": (io.BytesIO(b"abc"), "a.txt")},
-        content_type="multipart/form-data",
-    ).get_json()
+    p, uploaded = _project_with_upload(client, intent_text="Focus: Demo")
 
     target = "@firetailfab.com"
     resp = client.post(
@@ -480,3 +645,24 @@ def test_generate_ai_mode_injects_cta_target_when_ai_omits_it(tmp_path, monkeypa
     # Backend should guarantee the exact target string appears even if AI forgot.
     assert target in (data.get("bluesky", {}).get("text") or "")
     assert target in (data.get("youtube", {}).get("description") or "")
+
+
+def test_parse_builder_fields_matches_line_based_rules():
+    from app.web.routes import _parse_builder_fields
+
+    text = "  FOCUS: first\r\nAudience:  makers \n\ttone:\nfocus: second  Tone: Cozy"
+    assert _parse_builder_fields(text) == ("second", "makers", "Cozy")
+    assert _parse_builder_fields("no fields here\nfocus :x") == ("", None, None)
+    assert _parse_builder_fields("audience:\n") == ("", None, None)
+
+
+def test_media_file_uses_x_sendfile_when_enabled(tmp_path, monkeypatch):
+    monkeypatch.setenv("USE_X_SENDFILE", "1")
+    client, _ = _make_client(tmp_path, monkeypatch)
+
+    p, uploaded = _project_with_upload(client)
+
+    resp = client.get(f"/media/{uploaded['id']}")
+    assert resp.status_code == 200
+    assert resp.headers["X-Sendfile"].startswith(str(tmp_path / "uploads"))
+    assert resp.get_data() == b""
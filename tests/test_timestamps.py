@@ -0,0 +1,15 @@
+from datetime import datetime, timezone
+
+
+def test_utc_timestamps_round_trip_and_match_clock(monkeypatch):
+    from app.core import timestamps
+
+    monkeypatch.setattr(timestamps.time, "time_ns", lambda: 1_768_673_000_000_000_000)
+    assert timestamps.utc_now_iso() == "2026-01-17T18:03:20.000000+00:00"
+    assert timestamps.utc_now_iso_z() == "2026-01-17T18:03:20.000000Z"
+
+    monkeypatch.undo()
+    before = datetime.now(timezone.utc)
+    parsed = datetime.fromisoformat(timestamps.utc_now_iso())
+    assert parsed.tzinfo is not None
+    assert before <= parsed <= datetime.now(timezone.utc)